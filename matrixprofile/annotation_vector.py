@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import numpy as np
+
+from .utils import mov_sum, mov_mean_std
+
+
+def _min_max_scale(x):
+    """
+    Scales x linearly into [0, 1]. A constant x maps to ones.
+    :param x: Array
+    :return: Scaled array
+    """
+    x_min, x_max = np.min(x), np.max(x)
+    if x_max == x_min:
+        return np.ones(len(x))
+
+    return (x - x_min) / (x_max - x_min)
+
+
+def complexity_av(ts, m):
+    """
+    Annotation vector favouring complex subsequences. The complexity estimate of a subsequence is the length of
+    the line obtained by stretching it out, sqrt(sum(diff(subsequence) ** 2)), scaled into [0, 1].
+    :param ts: Timeseries
+    :param m: Subsequence length
+    :return: Annotation vector
+    """
+    ts = np.asarray(ts, dtype=float)
+    ce = np.sqrt(mov_sum(np.diff(ts) ** 2, m - 1))
+    return _min_max_scale(ce)
+
+
+def meanstd_av(ts, m):
+    """
+    Annotation vector suppressing flat stretches of the series: subsequences whose standard deviation is below
+    the mean subsequence standard deviation get 0, all others get 1
+    :param ts: Timeseries
+    :param m: Subsequence length
+    :return: Annotation vector
+    """
+    std = mov_mean_std(np.asarray(ts), m)[1]
+    return (std >= np.mean(std)).astype(float)
+
+
+def clipping_av(ts, m):
+    """
+    Annotation vector suppressing clipped subsequences. The value is 1 minus the fraction of the subsequence
+    sitting at the global minimum or maximum of the series, scaled into [0, 1].
+    :param ts: Timeseries
+    :param m: Subsequence length
+    :return: Annotation vector
+    """
+    ts = np.asarray(ts, dtype=float)
+    clipped = (ts == np.min(ts)) | (ts == np.max(ts))
+    return _min_max_scale(m - mov_sum(clipped.astype(float), m))
+
+
+def motion_artifact_av(ts, m, threshold=5.0):
+    """
+    Annotation vector masking subsequences that contain an abrupt jump, i.e. a step between consecutive points
+    larger than threshold times the standard deviation of all steps
+    :param ts: Timeseries
+    :param m: Subsequence length
+    :param threshold: Jump size in standard deviations of the first difference
+    :return: Annotation vector of zeros (subsequence contains a jump) and ones
+    """
+    steps = np.abs(np.diff(np.asarray(ts, dtype=float)))
+    jumps = steps > threshold * np.std(steps)
+    return (mov_sum(jumps.astype(float), m - 1) == 0).astype(float)
+
+
+def combine_av(*avs):
+    """
+    Combines annotation vectors by multiplying them, so that a subsequence suppressed by any of them stays
+    suppressed
+    :param avs: Annotation vectors of equal length
+    :return: Combined annotation vector
+    """
+    if not avs:
+        raise ValueError("At least one annotation vector is required")
+
+    if len(set(len(av) for av in avs)) != 1:
+        raise ValueError("Annotation vectors must all be the same length")
+
+    av = np.ones(len(avs[0]))
+    for other in avs:
+        av *= other
+
+    return av
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from six.moves import range
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from .matrix_profile import stomp
+from .utils import mov_mean_std, valid_windows, fill_invalid, sliding_dot_product, _stomp_rows
+
+
+# Default downsampling keeps at least this many PAA segments per query
+_MIN_PAA_QUERY = 16
+
+# Number of values multiplied at once when computing the distances to the proposed neighbours
+_PAIR_CHUNK_ELEMENTS = 2 ** 20
+
+
+def paa(ts, factor):
+    """
+    Piecewise Aggregate Approximation: the mean of every run of factor consecutive points. A trailing partial
+    run is dropped.
+    :param ts: Timeseries
+    :param factor: Number of points per segment
+    :return: Downsampled time series
+    """
+    ts = np.asarray(ts, dtype=float)
+    n = len(ts) // factor
+    return ts[:n * factor].reshape(n, factor).mean(axis=1)
+
+
+def _pair_distances(ts, m, mean, std, rows, columns):
+    """
+    Z-normalized Euclidean distances between the subsequences rows[i] and columns[i], computed in chunks
+    """
+    windows = as_strided(ts, shape=(len(ts) - m + 1, m), strides=(ts.strides[0],) * 2)
+    distances = np.empty(len(rows))
+
+    chunk = max(1, _PAIR_CHUNK_ELEMENTS // m)
+    for i in range(0, len(rows), chunk):
+        r = rows[i:i + chunk]
+        c = columns[i:i + chunk]
+        dot = np.einsum('ij,ij->i', windows[r], windows[c])
+        distances[i:i + chunk] = 2 * m * (1 - (dot - m * mean[r] * mean[c]) / (m * std[r] * std[c]))
+
+    return np.sqrt(np.maximum(distances, 0))
+
+
+def approx_mp(ts_a, m, accuracy=0.05, factor=None):
+    """
+    Approximate self-join matrix profile. A STOMP profile of the PAA-downsampled series proposes a nearest
+    neighbour for every subsequence, and every entry starts as the exact distance to its proposed neighbour.
+    The subsequences with the lowest (motif) and highest (discord) downsampled profile values are then refined
+    with their full resolution distance profile (STOMP rows), which gives their exact matrix profile value and, by
+    symmetry, lowers every other entry whose distance to them is smaller.
+    :param ts_a: Time series
+    :param m: Query length
+    :param accuracy: Fraction of the profile to refine, between 0 (coarse profile only) and 1 (exact profile)
+    :param factor: Downsampling factor (None picks m // 16 so that queries keep 16 PAA segments)
+    :return: (matrix profile, matrix profile index, error). Every entry is the exact distance to the returned
+    neighbour, so it is never below the exact matrix profile value. error is 0 for the refined entries, which are
+    exact, and mp for the others: no lower bound is computed for those, so error only tells the exact entries
+    apart and is not an error bound. (A PAA lower bound valid against every candidate costs as much as the exact
+    profile, and one taken from the downsampled profile alone is 0 almost everywhere.)
+    """
+    if not 0 <= accuracy <= 1:
+        raise ValueError("accuracy must be between 0 and 1")
+
+    ts_a = np.asarray(ts_a, dtype=float)
+    n = len(ts_a)
+    length = n - m + 1
+    factor = max(1, m // _MIN_PAA_QUERY) if factor is None else int(factor)
+
+    if factor == 1:
+        mp, mp_index = stomp(ts_a, m)
+        return mp, mp_index, np.zeros(length)
+
+    m_paa = m // factor
+    mp_paa, mp_index_paa = stomp(paa(ts_a, factor), m_paa)
+
+    # Every full resolution subsequence proposes the subsequence at the same offset within the coarse neighbour
+    rows = np.arange(length)
+    coarse = np.minimum(rows // factor, len(mp_paa) - 1)
+    proposed = mp_index_paa[coarse] * factor + rows % factor
+    proposed = np.where(np.isfinite(proposed), np.minimum(proposed, length - 1), -1).astype(np.int64)
+
+    # Proposals inside the exclusion zone (or missing) are not neighbours
+    trivial = (proposed >= rows - np.round(m / 2, 0)) & (proposed < rows + np.round(m / 2 + 1, 0))
+    usable = (proposed >= 0) & ~trivial
+
+    valid = valid_windows(ts_a, m)
+    filled = ts_a if valid is None else fill_invalid(ts_a)
+    mean, std = mov_mean_std(filled, m)
+
+    mp = np.full(length, np.inf)
+    mp_index = np.full(length, np.inf)
+    if valid is not None:
+        usable &= valid[rows] & valid[np.maximum(proposed, 0)]
+
+    mp[usable] = _pair_distances(filled, m, mean, std, rows[usable], proposed[usable])
+    mp_index[usable] = proposed[usable]
+
+    # Refine the lowest and highest coarse entries, half of the budget each. At full accuracy the last partial
+    # segment, which the downsampled profile does not cover, is refined as well.
+    n_candidates = int(np.ceil(accuracy * len(mp_paa)))
+    ranked = np.argsort(mp_paa, kind='mergesort')
+    candidates = np.unique(np.concatenate((ranked[:n_candidates - n_candidates // 2],
+                                           ranked[len(ranked) - n_candidates // 2:])))
+
+    refined = np.zeros(length, dtype=bool)
+    for segment in candidates:
+        refined[segment * factor:(segment + 1) * factor] = True
+
+    if accuracy == 1:
+        refined[len(mp_paa) * factor:] = True
+
+    # Consecutive refined rows are computed in blocks with the STOMP recurrence, each row giving the exact
+    # matrix profile value of its subsequence and, by symmetry, a distance to every other one
+    squared = np.square(mp)
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], refined, [False]))))
+    dot_first = sliding_dot_product(filled[:m], filled)
+    stats = (mean, std, mean, std, valid, valid)
+    for start, stop in zip(edges[::2], edges[1::2]):
+        dot = sliding_dot_product(filled[start:start + m], filled)
+        for idx, distance_profile in _stomp_rows(filled, filled, m, stats, dot, dot_first, start, stop, True):
+            ids_to_update = distance_profile < squared
+            mp_index[ids_to_update] = idx
+            np.minimum(squared, distance_profile, out=squared)
+
+            best = np.argmin(distance_profile)
+            squared[idx] = distance_profile[best]
+            mp_index[idx] = best if np.isfinite(distance_profile[best]) else np.inf
+
+    mp = np.sqrt(np.maximum(squared, 0))
+    error = np.where(refined, 0.0, mp)
+    return mp, mp_index, error
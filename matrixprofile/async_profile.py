@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# asyncio front end for the matrix profile engines. This module requires Python 3.7+ (async generators,
+# asyncio.get_running_loop) and is therefore not imported by the package itself.
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import order
+from .distance_profile import naive_distance_profile, mass_distance_profile, stomp_distance_profile
+from .matrix_profile import _iter_matrix_profile, _iter_matrix_profile_mass, _iter_matrix_profile_stomp
+
+
+# engine name -> (chunked matrix profile generator, order class, distance profile function)
+ENGINES = {
+    'naive': (_iter_matrix_profile, order.LinearOrder, naive_distance_profile),
+    'stmp': (_iter_matrix_profile_mass, order.LinearOrder, mass_distance_profile),
+    'stomp': (_iter_matrix_profile_stomp, order.LinearOrder, stomp_distance_profile),
+}
+
+# Number of distance profile values computed per chunk when no chunk size is given
+_CHUNK_WORK = 2 ** 22
+
+
+Progress = namedtuple('Progress', ['rows_done', 'rows_total', 'mp', 'mp_index'])
+Progress.__doc__ = """
+Snapshot of a running matrix profile computation. mp and mp_index are copies of the partial profile after
+rows_done of rows_total distance profiles, and are final once rows_done == rows_total.
+"""
+
+
+def _next_chunk(chunks):
+    """
+    Advances a chunked matrix profile generator by one chunk. Runs inside the executor.
+    :param chunks: Generator of (rows_done, rows_total, mp, mp_index)
+    :return: Progress snapshot, or None once the generator is exhausted
+    """
+    for rows_done, rows_total, mp, mp_index in chunks:
+        return Progress(rows_done, rows_total, np.copy(mp), np.copy(mp_index))
+
+    return None
+
+
+class ProfileRunner(object):
+    """
+    Runs matrix profile computations on a shared thread pool without blocking the event loop.
+
+    Each job is computed in chunks of rows, one executor task per chunk, so jobs sharing the pool interleave
+    chunk by chunk and a job can be cancelled between chunks. At most max_jobs jobs hold a slot at any one time;
+    further jobs wait for a slot in the order in which they were started.
+    """
+
+    def __init__(self, max_workers=None, max_jobs=None, executor=None):
+        """
+        :param max_workers: Number of worker threads (ignored when executor is given)
+        :param max_jobs: Maximum number of concurrently running jobs (defaults to the number of workers)
+        :param executor: Optional concurrent.futures executor to run the chunks on
+        """
+        self._owns_executor = executor is None
+        self._executor = ThreadPoolExecutor(max_workers) if executor is None else executor
+        self.max_jobs = max_jobs if max_jobs is not None else getattr(self._executor, '_max_workers', 1)
+        self._slots = weakref.WeakKeyDictionary()
+
+    def _job_slots(self):
+        # One semaphore per event loop, since a semaphore binds to the loop that first waits on it
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_jobs)
+
+        return slots
+
+    async def _step(self, chunks):
+        """
+        Computes the next chunk of a job in the executor. If the awaiting task is cancelled, the chunk already
+        in flight is allowed to finish before the cancellation propagates, so that the job slot is only released
+        once its worker is idle.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, _next_chunk, chunks)
+
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+
+    async def stream(self, ts_a, m, ts_b=None, engine='stomp', chunk_size=None):
+        """
+        Computes a matrix profile chunk by chunk, yielding a Progress snapshot after each chunk. The last
+        snapshot holds the complete profile. Close the iterator (or cancel the consuming task) to stop the
+        computation between chunks.
+        :param ts_a: Time series containing the queries
+        :param m: Query length
+        :param ts_b: Time series to compare the queries against (None for a self-join)
+        :param engine: One of 'stomp', 'stmp' or 'naive'
+        :param chunk_size: Number of distance profiles per chunk (None picks a size from the series length)
+        :return: Async iterator of Progress
+        """
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine '{}', expected one of {}".format(engine, sorted(ENGINES)))
+
+        iter_function, order_class, distance_profile_function = ENGINES[engine]
+
+        if chunk_size is None:
+            n = len(ts_a) if ts_b is None else len(ts_b)
+            chunk_size = max(1, _CHUNK_WORK // max(n, 1))
+
+        async with self._job_slots():
+            chunks = iter_function(ts_a, m, order_class, distance_profile_function, ts_b, chunk_size)
+            try:
+                while True:
+                    progress = await self._step(chunks)
+                    if progress is None:
+                        return
+
+                    yield progress
+            finally:
+                chunks.close()
+
+    async def run(self, ts_a, m, ts_b=None, engine='stomp', chunk_size=None, callback=None):
+        """
+        Computes a matrix profile without blocking the event loop
+        :param ts_a: Time series containing the queries
+        :param m: Query length
+        :param ts_b: Time series to compare the queries against (None for a self-join)
+        :param engine: One of 'stomp', 'stmp' or 'naive'
+        :param chunk_size: Number of distance profiles per chunk (None picks a size from the series length)
+        :param callback: Optional function called with every Progress snapshot
+        :return: (matrix profile, matrix profile index)
+        """
+        progress = None
+        async for progress in self.stream(ts_a, m, ts_b, engine, chunk_size):
+            if callback is not None:
+                callback(progress)
+
+        return progress.mp, progress.mp_index
+
+    def shutdown(self, wait=True):
+        """
+        Shuts down the executor if it was created by this runner
+        :param wait: Wait for running chunks to finish
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+
+
+_default_runner = None
+
+
+def default_runner():
+    """
+    Returns the process-wide ProfileRunner used by stomp_async and stmp_async, creating it on first use
+    :return: ProfileRunner
+    """
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = ProfileRunner()
+
+    return _default_runner
+
+
+async def stmp_async(ts_a, m, ts_b=None, chunk_size=None, runner=None):
+    """
+    STMP on a worker thread, see ProfileRunner.run
+    :param ts_a:
+    :param m:
+    :param ts_b:
+    :param chunk_size:
+    :param runner: ProfileRunner to use (None uses default_runner())
+    :return: (matrix profile, matrix profile index)
+    """
+    runner = default_runner() if runner is None else runner
+    return await runner.run(ts_a, m, ts_b, 'stmp', chunk_size)
+
+
+async def stomp_async(ts_a, m, ts_b=None, chunk_size=None, runner=None):
+    """
+    STOMP on a worker thread, see ProfileRunner.run
+    :param ts_a:
+    :param m:
+    :param ts_b:
+    :param chunk_size:
+    :param runner: ProfileRunner to use (None uses default_runner())
+    :return: (matrix profile, matrix profile index)
+    """
+    runner = default_runner() if runner is None else runner
+    return await runner.run(ts_a, m, ts_b, 'stomp', chunk_size)
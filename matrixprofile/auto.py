@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import math
+import multiprocessing
+import os
+
+from . import matrix_profile as engines
+from .approximate import approx_mp
+from .result import MatrixProfile
+from .utils import next_fast_len, _n_jobs
+
+
+# Cost model, calibrated on the numpy engines. Times are in seconds, sizes in bytes.
+_STOMP_ROW_SECONDS = 1.5e-5
+_STOMP_ELEMENT_SECONDS = 1e-8
+_MASS_ROW_SECONDS = 2e-4
+_FFT_ELEMENT_SECONDS = 3e-9
+_NAIVE_ELEMENT_SECONDS = 1e-6
+_FLOAT_BYTES = 8
+
+# Below this sampling fraction STAMP leaves too many entries far from their exact value, and the self-join falls
+# back to the downsampled approximation instead
+_MIN_SAMPLING = 0.25
+
+# Largest fraction of the profile approx_mp refines at full resolution, lowered to meet a time budget
+_APPROX_ACCURACY = 0.05
+
+
+Plan = collections.namedtuple('Plan', ['engine', 'options', 'seconds', 'memory', 'exact'])
+Plan.__doc__ = """
+Strategy chosen by plan: the engine name, its keyword options, the estimated run time and peak working memory,
+and whether the result is the exact matrix profile
+"""
+
+
+def available_memory():
+    """
+    Physical memory currently available, or None where the platform does not report it
+    """
+    try:
+        return os.sysconf(str('SC_AVPHYS_PAGES')) * os.sysconf(str('SC_PAGE_SIZE'))
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def describe(plan_):
+    """
+    Name of a plan as recorded in MatrixProfile.algorithm, e.g. 'stamp(sampling=0.3)'
+    """
+    if not plan_.options:
+        return plan_.engine
+
+    options = ', '.join('{}={:.3g}'.format(key, value) if isinstance(value, float) else '{}={}'.format(key, value)
+                        for key, value in sorted(plan_.options.items()))
+    return '{}({})'.format(plan_.engine, options)
+
+
+def _mass_row_seconds(n):
+    fft_length = next_fast_len(n)
+    return _MASS_ROW_SECONDS + _FFT_ELEMENT_SECONDS * fft_length * math.log(fft_length, 2)
+
+
+def _mass_memory(n):
+    # A handful of complex spectra per distance profile
+    return 4 * 2 * _FLOAT_BYTES * next_fast_len(n)
+
+
+def _exact_plans(n_a, n_b, m, cores, n_jobs):
+    """
+    Cost of every exact engine. The MASS based engines run one FFT per subsequence of ts_a over ts_b, the row
+    blocks of stomp_parallel one recurrence step per subsequence of ts_b over ts_a.
+    """
+    length_a = n_a - m + 1
+    length_b = n_b - m + 1
+    base = 4 * _FLOAT_BYTES * (n_a + n_b)
+
+    yield Plan('naive_mp', {}, length_a * length_b * m * _NAIVE_ELEMENT_SECONDS, base + 4 * _FLOAT_BYTES * length_b,
+               True)
+    yield Plan('stmp', {}, length_a * _mass_row_seconds(n_b), base + _mass_memory(n_b), True)
+
+    # The recurrence is memory bound: threads beyond the core count add no throughput
+    jobs = max(1, min(n_jobs, cores, length_b))
+    seconds = length_b * (_STOMP_ROW_SECONDS + _STOMP_ELEMENT_SECONDS * length_a / jobs)
+    seconds += jobs * _mass_row_seconds(n_a)
+    yield Plan('stomp_parallel', {'n_jobs': jobs}, seconds,
+               2 * base + jobs * (4 * _FLOAT_BYTES * length_a + _mass_memory(n_a)), True)
+
+
+def _stamp_plan(n_a, n_b, m, time_budget):
+    length_a = n_a - m + 1
+    seconds = length_a * _mass_row_seconds(n_b)
+    sampling = 1.0 if time_budget is None else min(1.0, max(1.0 / length_a, time_budget / seconds))
+    return Plan('stamp', {'sampling': sampling}, sampling * seconds,
+                4 * _FLOAT_BYTES * (n_a + n_b) + _mass_memory(n_b), False)
+
+
+def _approx_plans(n, m, cores, n_jobs, time_budget):
+    """
+    Cost of approx_mp for every downsampling factor, from the most to the least accurate. The fraction of the
+    profile refined at full resolution is lowered from _APPROX_ACCURACY until the plan meets the time budget, or
+    down to 0 (the downsampled profile alone) when it cannot.
+    """
+    length = n - m + 1
+    factor = 2
+    while m // factor > 1:
+        coarse = list(_exact_plans(n // factor, n // factor, m // factor, cores, n_jobs))[-1]
+        # Plus the distances to the proposed neighbours, and per refined row a STOMP row and a share of the
+        # sliding dot products that start the refined segments
+        seconds = coarse.seconds + length * m * _STOMP_ELEMENT_SECONDS
+        refined_row = _STOMP_ROW_SECONDS + _STOMP_ELEMENT_SECONDS * length + _mass_row_seconds(n) / factor
+        accuracy = _APPROX_ACCURACY
+        if time_budget is not None:
+            accuracy = min(accuracy, max(0.0, (time_budget - seconds) / (refined_row * length)))
+
+        seconds += accuracy * length * refined_row
+        yield Plan('approx_mp', {'factor': factor, 'accuracy': accuracy}, seconds,
+                   8 * _FLOAT_BYTES * length + coarse.memory, False)
+        factor *= 2
+
+
+def plan(n_a, m, n_b=None, time_budget=None, memory_limit=None, n_jobs=None):
+    """
+    Chooses how to compute a matrix profile. The fastest exact engine that fits in memory is used when it meets the
+    time budget. Otherwise an AB-join is sampled with STAMP, stopped when the budget runs out, and a self-join
+    is sampled the same way if at least a quarter of the rows fit in the budget, and approximated on a
+    downsampled series with approx_mp otherwise, refining as much of the profile as the budget allows.
+    :param n_a: Length of the first time series
+    :param m: Query length
+    :param n_b: Length of the second time series (None for a self-join)
+    :param time_budget: Seconds the computation should take at most (None for no limit)
+    :param memory_limit: Bytes of working memory (None for the currently available physical memory)
+    :param n_jobs: Number of threads (None or -1 for one per core)
+    :return: Plan
+    """
+    if m > n_a or (n_b is not None and m > n_b):
+        raise ValueError("Query length must not be longer than the time series")
+
+    cores = multiprocessing.cpu_count()
+    n_jobs = cores if n_jobs is None else _n_jobs(n_jobs)
+    memory_limit = available_memory() if memory_limit is None else memory_limit
+
+    def fits(plan_):
+        return memory_limit is None or plan_.memory <= memory_limit
+
+    def in_time(plan_):
+        return time_budget is None or plan_.seconds <= time_budget
+
+    exact = [plan_ for plan_ in _exact_plans(n_a, n_a if n_b is None else n_b, m, cores, n_jobs) if fits(plan_)]
+    if exact:
+        fastest = min(exact, key=lambda plan_: plan_.seconds)
+        if in_time(fastest):
+            return fastest
+
+    sampled = _stamp_plan(n_a, n_a if n_b is None else n_b, m, time_budget)
+    sampling_usable = n_b is not None or sampled.options['sampling'] >= _MIN_SAMPLING
+    if sampling_usable and fits(sampled):
+        return sampled
+
+    # approx_mp only computes self-joins
+    approximate = [] if n_b is not None else [plan_ for plan_ in _approx_plans(n_a, m, cores, n_jobs, time_budget)
+                                              if fits(plan_)]
+    for plan_ in approximate:
+        if in_time(plan_):
+            return plan_
+
+    # Nothing meets the budget: the cheapest plan that fits in memory. A self-join is only sampled below
+    # _MIN_SAMPLING when approx_mp cannot run at all.
+    fallback = exact + approximate
+    if fits(sampled) and (sampling_usable or not approximate):
+        fallback.append(sampled)
+
+    if not fallback:
+        raise MemoryError("No matrix profile engine fits in {} bytes".format(memory_limit))
+
+    return min(fallback, key=lambda plan_: plan_.seconds)
+
+
+def matrix_profile(ts_a, m, ts_b=None, time_budget=None, memory_limit=None, n_jobs=None):
+    """
+    Matrix profile with automatic engine selection, see plan
+    :param ts_a: Time series containing the queries
+    :param m: Query length
+    :param ts_b: Second time series (None for a self-join)
+    :param time_budget: Seconds the computation should take at most (None for no limit)
+    :param memory_limit: Bytes of working memory (None for the currently available physical memory)
+    :param n_jobs: Number of threads (None or -1 for one per core)
+    :return: MatrixProfile whose algorithm names the strategy used (see describe)
+    """
+    plan_ = plan(len(ts_a), m, None if ts_b is None else len(ts_b), time_budget, memory_limit, n_jobs)
+
+    if plan_.engine == 'approx_mp':
+        result = approx_mp(ts_a, m, **plan_.options)[:2]
+
+    else:
+        result = getattr(engines, plan_.engine)(ts_a, m, ts_b, **plan_.options)
+
+    return MatrixProfile.from_engine(result, ts_a, m, ts_b, algorithm=describe(plan_))
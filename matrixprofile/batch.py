@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from six.moves import range
+
+import numpy as np
+import numpy.fft as fft
+
+from .utils import RollingStats, _stomp_rows
+
+
+# Upper bound on the number of elements of every (batch, profile) working array
+_MAX_BLOCK_ELEMENTS = 2 ** 22
+
+
+def batch_mov_mean_std(ts, m):
+    """
+    Row-wise moving mean and standard deviation of a 2-D array of equal-length time series, see utils.mov_mean_std
+    :param ts: Time series, one per row
+    :param m: Window width
+    :return: (moving mean, moving std dev), one row per series
+    """
+
+    if m <= 1:
+        raise ValueError("Query length must be longer than one")
+
+    ts = np.asarray(ts, dtype=float)
+    rows, n = ts.shape
+
+    # The series are laid end to end and padded so that every row holds n windows, of which the ones that run
+    # into the next row are dropped
+    stats = RollingStats(np.concatenate((ts.ravel(), np.zeros(m - 1))))
+    mean, std = stats.mean_std(m)
+    return mean.reshape(rows, n)[:, :n - m + 1], std.reshape(rows, n)[:, :n - m + 1]
+
+
+def batch_sliding_dot_product(queries, ts):
+    """
+    Row-wise sliding dot product of every query against the time series in the same row, using one batched rFFT
+    :param queries: Queries of equal length, one per row
+    :param ts: Time series of equal length, one per row
+    :return: Sliding dot products, one row per series
+    """
+    m = queries.shape[1]
+    n = ts.shape[1]
+
+    # Zero-padding both sides to n avoids circular wrap-around for the n - m + 1 valid products
+    dot_product = fft.irfft(fft.rfft(ts, n, axis=1) * fft.rfft(queries[:, ::-1], n, axis=1), n, axis=1)
+    return dot_product[:, m - 1:n]
+
+
+def _stomp_batch(ts, m):
+    """
+    STOMP self-join of equal-length time series, vectorized across the series
+    :param ts: Time series, one per row
+    :param m: Query length
+    :return: (matrix profiles, matrix profile indices), one row per series
+    """
+    length = ts.shape[1] - m + 1
+
+    # Windows holding NaN or inf are flagged and the values replaced by zero, as in the single series engines
+    finite = np.isfinite(ts)
+    valid = None
+    if not finite.all():
+        bad = np.concatenate((np.zeros((ts.shape[0], 1)), np.cumsum(~finite, axis=1)), axis=1)
+        valid = bad[:, m:] == bad[:, :-m]
+        ts = np.where(finite, ts, 0.0)
+
+    mean, std = batch_mov_mean_std(ts, m)
+
+    # The first row of dot products is also the first column by symmetry
+    dot_first = batch_sliding_dot_product(ts[:, :m], ts)
+
+    mp = np.full((ts.shape[0], length), np.inf)
+    mp_index = np.full((ts.shape[0], length), np.inf)
+
+    # Squared distances; the square root is taken once at the end
+    stats = (mean, std, mean, std, valid, valid)
+    for idx, distance_profile in _stomp_rows(ts, ts, m, stats, np.copy(dot_first), dot_first, 0, length, True):
+        ids_to_update = distance_profile < mp
+        mp_index[ids_to_update] = idx
+        np.minimum(mp, distance_profile, out=mp)
+
+    return np.sqrt(np.maximum(mp, 0)), mp_index
+
+
+def stomp_batch(series, m):
+    """
+    STOMP self-join matrix profiles of many time series in one call. The rolling statistics, the first row of dot
+    products and the STOMP recurrence are vectorized across the series, so the per-series Python overhead is paid
+    once per block of series instead of once per series.
+    :param series: 2-D array with one time series per row, or a list of (possibly different length) time series
+    :param m: Query length
+    :return: (matrix profiles, matrix profile indices): 2-D arrays for 2-D input, lists of arrays for list input
+    """
+    if isinstance(series, np.ndarray) and series.ndim == 2:
+        return _stomp_equal_length(np.asarray(series, dtype=float), m)
+
+    series = [np.asarray(ts, dtype=float) for ts in series]
+    mps = [None] * len(series)
+    mp_indices = [None] * len(series)
+
+    # Series of the same length are profiled together
+    lengths = np.array([len(ts) for ts in series], dtype=int)
+    for n in np.unique(lengths):
+        members = np.flatnonzero(lengths == n)
+        mp, mp_index = _stomp_equal_length(np.vstack([series[i] for i in members]), m)
+
+        for row, i in enumerate(members):
+            mps[i] = mp[row]
+            mp_indices[i] = mp_index[row]
+
+    return mps, mp_indices
+
+
+def _stomp_equal_length(ts, m):
+    """
+    Splits a 2-D array of series into blocks that keep the working arrays bounded and profiles every block
+    :param ts: Time series, one per row
+    :param m: Query length
+    :return: (matrix profiles, matrix profile indices), one row per series
+    """
+    length = ts.shape[1] - m + 1
+    if length < 1:
+        raise ValueError("Query length must not be longer than the time series")
+
+    block = max(1, _MAX_BLOCK_ELEMENTS // length)
+
+    mp = np.empty((ts.shape[0], length))
+    mp_index = np.empty((ts.shape[0], length))
+    for start in range(0, ts.shape[0], block):
+        mp[start:start + block], mp_index[start:start + block] = _stomp_batch(ts[start:start + block], m)
+
+    return mp, mp_index
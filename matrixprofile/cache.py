@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from . import matrix_profile
+from .result import MatrixProfile
+from .utils import series_hash
+
+
+# engine name -> (engine function, whether the engine is exact, so that a cached prefix can be extended)
+ENGINES = {
+    'naive': (matrix_profile.naive_mp, True),
+    'stmp': (matrix_profile.stmp, True),
+    'stamp': (matrix_profile.stamp, False),
+    'stomp': (matrix_profile.stomp, True),
+}
+
+
+class ProfileCache(object):
+    """
+    Opt-in cache of matrix profiles keyed by the content of the input series, the query length, the engine and its
+    options. Profiles are kept in a size-bounded in-memory LRU and, when a directory is given, written through to
+    disk so that they survive evictions and restarts.
+
+    When a self-join misses, a cached profile of a prefix of the series (same engine, m and options) is extended
+    to the new tail instead of recomputing the whole profile. This only applies to the exact engines.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20, directory=None, max_disk_bytes=None):
+        """
+        :param max_bytes: Memory budget for the cached arrays
+        :param directory: Optional directory for the on-disk tier
+        :param max_disk_bytes: Optional budget for the on-disk tier (least recently written files are removed first)
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self):
+        """
+        Cache statistics: hits (memory tier), disk_hits, prefix_hits (served by extending a cached prefix),
+        misses, evictions, and the number of entries and bytes held in memory
+        """
+        with self._lock:
+            return {'hits': self.hits, 'disk_hits': self.disk_hits, 'prefix_hits': self.prefix_hits,
+                    'misses': self.misses, 'evictions': self.evictions, 'entries': len(self._entries),
+                    'bytes': self._bytes}
+
+    @staticmethod
+    def key(engine, ts_a, m, ts_b=None, **options):
+        """
+        Cache key for a matrix profile computation
+        :param engine: Engine name
+        :param ts_a: Time series containing the queries
+        :param m: Query length
+        :param ts_b: Second time series (None for a self-join)
+        :param options: Engine options
+        :return: Hex digest
+        """
+        description = [engine, int(m), series_hash(ts_a), None if ts_b is None else series_hash(ts_b),
+                       sorted((k, repr(v)) for k, v in options.items())]
+        return hashlib.sha1(json.dumps(description).encode('utf-8')).hexdigest()
+
+    def compute(self, engine, ts_a, m, ts_b=None, **options):
+        """
+        Returns the cached matrix profile, computing and caching it on a miss
+        :param engine: One of 'naive', 'stmp', 'stamp' or 'stomp'
+        :param ts_a: Time series containing the queries
+        :param m: Query length
+        :param ts_b: Second time series (None for a self-join)
+        :param options: Engine options, e.g. sampling for stamp
+        :return: MatrixProfile (the arrays are copies and may be modified freely)
+        """
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine '{}', expected one of {}".format(engine, sorted(ENGINES)))
+
+        if options.get('left_right'):
+            raise ValueError("Left and right matrix profiles are not cached")
+
+        engine_function, exact = ENGINES[engine]
+        key = self.key(engine, ts_a, m, ts_b, **options)
+
+        result = self._get(key)
+        if result is None:
+            result = self._extend_prefix(engine, ts_a, m, ts_b, options, exact)
+
+        if result is None:
+            with self._lock:
+                self.misses += 1
+
+            result = MatrixProfile.from_engine(engine_function(ts_a, m, ts_b, **options), ts_a, m, ts_b, engine)
+
+        self._put(key, result, engine, options)
+        return MatrixProfile(np.copy(result.mp), np.copy(result.mp_index), result.m, result.join, result.algorithm,
+                             result.input_hash)
+
+    def wrap(self, engine):
+        """
+        Returns a cached version of an engine with the engine's signature and (mp, mp_index) return value
+        :param engine: Engine name
+        :return: Function
+        """
+        def cached(ts_a, m, ts_b=None, **options):
+            return tuple(self.compute(engine, ts_a, m, ts_b, **options))
+
+        return cached
+
+    def clear(self):
+        """
+        Empties the in-memory tier (the on-disk tier is kept)
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.mpb')
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Mark as most recently used
+                self._entries[key] = self._entries.pop(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.directory is not None and os.path.exists(self._path(key)):
+            result = MatrixProfile.load(self._path(key), mmap=False)
+            with self._lock:
+                self.disk_hits += 1
+
+            return result
+
+        return None
+
+    def _extend_prefix(self, engine, ts_a, m, ts_b, options, exact):
+        """
+        Looks for the longest cached self-join profile of a prefix of ts_a and extends it to ts_a
+        """
+        if ts_b is not None or not exact or options.get('k', 1) != 1:
+            return None
+
+        with self._lock:
+            candidates = [(len(result.mp) + m - 1, result) for result, entry_engine, entry_options
+                          in self._entries.values()
+                          if entry_engine == engine and entry_options == options and result.m == m and
+                          result.join == 'self' and len(result.mp) + m - 1 < len(ts_a)]
+
+        for length, result in sorted(candidates, key=lambda candidate: -candidate[0]):
+            if series_hash(ts_a[:length]) == result.input_hash:
+                mp, mp_index = matrix_profile._extend_profile(ts_a, m, result.mp, result.mp_index)
+                with self._lock:
+                    self.prefix_hits += 1
+
+                return MatrixProfile.from_engine((mp, mp_index), ts_a, m, algorithm=engine)
+
+        return None
+
+    def _put(self, key, result, engine, options):
+        nbytes = result.mp.nbytes + result.mp_index.nbytes
+
+        with self._lock:
+            if key not in self._entries and nbytes <= self.max_bytes:
+                self._entries[key] = (result, engine, options)
+                self._bytes += nbytes
+
+                while self._bytes > self.max_bytes:
+                    _, (evicted, _, _) = self._entries.popitem(last=False)
+                    self._bytes -= evicted.mp.nbytes + evicted.mp_index.nbytes
+                    self.evictions += 1
+
+        if self.directory is not None and not os.path.exists(self._path(key)):
+            result.save(self._path(key))
+            self._trim_disk()
+
+    def _trim_disk(self):
+        if self.max_disk_bytes is None:
+            return
+
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.mpb')]
+        files.sort(key=os.path.getmtime)
+
+        total = sum(os.path.getsize(path) for path in files)
+        while files and total > self.max_disk_bytes:
+            path = files.pop(0)
+            total -= os.path.getsize(path)
+            os.remove(path)
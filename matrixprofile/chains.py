@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import numpy as np
+
+
+def chain_links(left_index, right_index):
+    """
+    Links every subsequence i to its right nearest neighbour j when i is also the left nearest neighbour of j.
+    These bidirectional links are the edges of the time series chains.
+    :param left_index: Left matrix profile index
+    :param right_index: Right matrix profile index
+    :return: Index of the next subsequence in the chain, -1 where a chain ends
+    """
+    left_index = np.asarray(left_index)
+    right_index = np.asarray(right_index)
+
+    links = np.full(len(right_index), -1, dtype=np.int64)
+    sources = np.flatnonzero(np.isfinite(right_index))
+    targets = right_index[sources].astype(np.int64)
+
+    linked = left_index[targets] == sources
+    links[sources[linked]] = targets[linked]
+    return links
+
+
+def _chain_positions(links):
+    """
+    Resolves the end of the chain and the number of links to it for every subsequence by pointer jumping:
+    every pass doubles the distance covered, so a chain of length L is resolved in log2(L) vectorized passes.
+    :param links: Output of chain_links
+    :return: (index of the last subsequence of the chain, number of links to it)
+    """
+    n = len(links)
+    ends = np.where(links >= 0, links, np.arange(n))
+    depth = (links >= 0).astype(np.int64)
+
+    while True:
+        jumped = ends[ends]
+        if (jumped == ends).all():
+            return ends, depth
+
+        depth = depth + depth[ends]
+        ends = jumped
+
+
+def all_chains(left_index, right_index, min_length=2):
+    """
+    Extracts every maximal time series chain (ATSC all-chain set) from the left and right matrix profile indices
+    :param left_index: Left matrix profile index
+    :param right_index: Right matrix profile index
+    :param min_length: Shortest chain to return
+    :return: List of chains, each an array of subsequence indices in time order, longest chains first
+    """
+    links = chain_links(left_index, right_index)
+    ends, depth = _chain_positions(links)
+
+    # Every subsequence has at most one predecessor, so chains never merge and each one has a unique end.
+    # Grouping by end and ordering by decreasing depth walks every chain from its head.
+    order = np.lexsort((-depth, ends))
+    boundaries = np.flatnonzero(np.diff(ends[order])) + 1
+    chains = [chain for chain in np.split(order, boundaries) if len(chain) >= min_length]
+
+    chains.sort(key=lambda chain: (-len(chain), chain[0]))
+    return chains
+
+
+def longest_chain(left_index, right_index):
+    """
+    Unanchored longest time series chain
+    :param left_index: Left matrix profile index
+    :param right_index: Right matrix profile index
+    :return: Array of subsequence indices in time order (the earliest one on ties)
+    """
+    links = chain_links(left_index, right_index)
+    if len(links) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    ends, depth = _chain_positions(links)
+    head = np.argmax(depth)
+
+    members = np.flatnonzero(ends == ends[head])
+    return members[np.argsort(-depth[members], kind='mergesort')]
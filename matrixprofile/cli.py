@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from . import matrix_profile
+from .discords import discords
+from .motifs import motifs
+from .result import MatrixProfile
+
+
+ENGINES = {
+    'naive': matrix_profile.naive_mp,
+    'stmp': matrix_profile.stmp,
+    'stamp': matrix_profile.stamp,
+    'stomp': matrix_profile.stomp,
+}
+
+PROFILE_SUFFIX = '.mpb'
+SUMMARY_SUFFIX = '.mp.json'
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='matrixprofile',
+        description="Compute matrix profiles for .npy and CSV files. The profile of every input is written next to "
+                    "it as <input>" + PROFILE_SUFFIX + " and the discords and motifs as <input>" + SUMMARY_SUFFIX +
+                    ". Inputs whose outputs are up to date are skipped.")
+    parser.add_argument('inputs', nargs='+', help="input files or glob patterns")
+    parser.add_argument('-m', type=int, required=True, help="subsequence length")
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='stomp', help="matrix profile engine")
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64',
+                        help="precision the series is read as; float32 also stores the profile compactly")
+    parser.add_argument('--column', type=int, default=0, help="column holding the series in multi-column CSVs")
+    parser.add_argument('--discords', type=int, default=3, help="number of discords to extract")
+    parser.add_argument('--motifs', type=int, default=3, help="number of motifs to extract")
+    parser.add_argument('--exclusion', type=int, default=None,
+                        help="exclusion zone around discords and motifs (default m / 2)")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="number of worker processes (-1 for one per core)")
+    parser.add_argument('-f', '--force', action='store_true', help="recompute up-to-date outputs")
+    return parser
+
+
+def _expand(patterns):
+    """
+    Expands glob patterns into a sorted list of unique files, keeping plain file names that match nothing
+    """
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if sys.version_info >= (3, 5) else glob.glob(pattern)
+        paths.update(matches if matches else [pattern])
+
+    return sorted(path for path in paths if not path.endswith((PROFILE_SUFFIX, SUMMARY_SUFFIX)))
+
+
+def read_series(path, dtype='float64', column=0):
+    """
+    Reads a time series from a .npy file (memory-mapped) or a CSV/text file
+    :param path: Input file
+    :param dtype: Precision to read the series as
+    :param column: Column holding the series in multi-column CSV files
+    :return: Time series
+    """
+    if path.endswith('.npy'):
+        ts = np.load(path, mmap_mode='r')
+    else:
+        ts = np.loadtxt(path, delimiter=',', ndmin=1)
+
+    if ts.ndim == 2:
+        ts = ts[:, column]
+
+    return np.asarray(ts, dtype=dtype)
+
+
+def _options(args):
+    """
+    Options that determine the outputs, recorded in the summary to detect stale results
+    """
+    return {'m': args.m, 'engine': args.engine, 'dtype': args.dtype, 'column': args.column,
+            'discords': args.discords, 'motifs': args.motifs, 'exclusion': args.exclusion}
+
+
+def _up_to_date(path, options):
+    summary_path = path + SUMMARY_SUFFIX
+    profile_path = path + PROFILE_SUFFIX
+    if not (os.path.exists(summary_path) and os.path.exists(profile_path)):
+        return False
+
+    modified = os.path.getmtime(path)
+    if os.path.getmtime(summary_path) < modified or os.path.getmtime(profile_path) < modified:
+        return False
+
+    with open(summary_path) as f:
+        return json.load(f).get('options') == options
+
+
+def process_file(path, options):
+    """
+    Profiles one file and writes its outputs
+    :param path: Input file
+    :param options: Output options (see _options)
+    :return: (path, number of points, seconds)
+    """
+    start = time.time()
+    m = options['m']
+    ts = read_series(path, options['dtype'], options['column'])
+
+    result = MatrixProfile.from_engine(ENGINES[options['engine']](ts, m), ts, m, algorithm=options['engine'])
+    result.save(path + PROFILE_SUFFIX, compact=options['dtype'] == 'float32')
+
+    ex_zone = m // 2 if options['exclusion'] is None else options['exclusion']
+    summary = {
+        'options': options,
+        'discords': [int(i) for i in discords(result.mp, ex_zone, options['discords']) if i < len(result.mp)],
+        'motifs': [int(i) for i in motifs(result.mp, ex_zone, options['motifs']) if i < len(result.mp)],
+    }
+    with open(path + SUMMARY_SUFFIX, 'w') as f:
+        json.dump(summary, f)
+
+    return path, len(ts), time.time() - start
+
+
+def _process_task(task):
+    path, options = task
+    try:
+        return process_file(path, options) + (None,)
+    except Exception as e:
+        return path, 0, 0.0, "{}: {}".format(type(e).__name__, e)
+
+
+def main(argv=None):
+    """
+    Console entry point
+    :param argv: Command line arguments (defaults to sys.argv[1:])
+    :return: Exit status
+    """
+    args = _parser().parse_args(argv)
+    options = _options(args)
+
+    paths = _expand(args.inputs)
+    todo = [path for path in paths if args.force or not _up_to_date(path, options)]
+    print("{} files, {} up to date".format(len(paths), len(paths) - len(todo)), file=sys.stderr)
+
+    jobs = multiprocessing.cpu_count() if args.jobs < 0 else max(1, args.jobs)
+    tasks = [(path, options) for path in todo]
+
+    start = time.time()
+    if jobs == 1 or len(tasks) <= 1:
+        results = (_process_task(task) for task in tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(min(jobs, len(tasks)))
+        results = pool.imap_unordered(_process_task, tasks)
+
+    points = 0
+    failures = 0
+    try:
+        for path, n, seconds, error in results:
+            if error is None:
+                points += n
+                print("{}: {} points in {:.2f}s".format(path, n, seconds), file=sys.stderr)
+            else:
+                failures += 1
+                print("{}: failed ({})".format(path, error), file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.time() - start
+    print("Processed {} files ({} points) in {:.2f}s, {:.0f} points/s".format(
+        len(tasks) - failures, points, elapsed, points / elapsed if elapsed > 0 else 0.0), file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+from six.moves import range
+
+import numpy as np
+
+from .mpdist import _SeriesStats, _ab_join
+from .utils import next_fast_len, _rfft, _irfft, _n_jobs
+
+
+def _ring_bounds(stats, m, fft_length, pool):
+    """
+    Joins every series with the next one in a ring. The profile of a series against a neighbour is the exact
+    nearest neighbour distance of each of its subsequences in that neighbour, so the larger of its two
+    neighbour profiles is a lower bound of the consensus radius of each subsequence.
+    :return: Squared lower bounds, one array per series
+    """
+    k = len(stats)
+    edges = [(j, (j + 1) % k) for j in range(k if k > 2 else 1)]
+    joins = pool(lambda edge: _ab_join(stats[edge[0]], stats[edge[1]], m, fft_length), edges)
+
+    bounds = [np.zeros(len(s.ts) - m + 1) for s in stats]
+    for (j, l), (mp_jl, mp_lj) in zip(edges, joins):
+        np.maximum(bounds[j], np.square(mp_jl), out=bounds[j])
+        np.maximum(bounds[l], np.square(mp_lj), out=bounds[l])
+
+    return bounds
+
+
+def _radius(stats, j, i, m, fft_length, skip, radius, best):
+    """
+    Squared consensus radius of subsequence i of series j: the largest of its nearest neighbour distances in the
+    other series. The evaluation is abandoned as soon as the radius exceeds best.
+    :param skip: Series whose nearest neighbour distance is already included in radius
+    :param radius: Squared lower bound the radius starts from
+    """
+    if stats[j].valid is not None and not stats[j].valid[i]:
+        return np.inf
+
+    query = stats[j].ts[i:i + m]
+    spectrum = _rfft(query[::-1], fft_length)
+    mean = stats[j].mean[i]
+    std = stats[j].std[i]
+
+    for l, other in enumerate(stats):
+        if l in skip:
+            continue
+
+        dot = _irfft(other.spectrum * spectrum, fft_length)[m - 1:len(other.ts)]
+        distance_profile = 2 * m * (1 - (dot - m * mean * other.mean) / (m * std * other.std))
+        if other.valid is not None:
+            distance_profile[~other.valid] = np.inf
+
+        distance = np.min(distance_profile)
+        radius = max(radius, distance)
+        if radius > best():
+            break
+
+    return radius
+
+
+def consensus_motif(series, m, n_jobs=None):
+    """
+    Consensus motif (Ostinato) of a collection of time series: the subsequence whose farthest nearest neighbour
+    among the other series is the closest, i.e. the pattern that recurs in every series.
+    The rolling statistics and spectrum of every series are computed once. A ring of AB-joins gives a lower
+    bound of the radius of every candidate, candidates are evaluated in increasing order of their bound, and
+    both the candidate loop and each evaluation stop as soon as the best-so-far radius is beaten. The
+    series are searched in parallel and share the best-so-far radius.
+    :param series: List of time series (lengths may differ)
+    :param m: Subsequence length
+    :param n_jobs: Number of threads (None for 1, -1 for one per core)
+    :return: (radius, index of the series, index of the subsequence in that series)
+    """
+    k = len(series)
+    if k < 2:
+        raise ValueError("At least two time series are needed")
+
+    fft_length = next_fast_len(max(len(ts) for ts in series))
+    stats = [_SeriesStats(ts, m, fft_length) for ts in series]
+
+    n_jobs = _n_jobs(n_jobs)
+    pool = ThreadPool(min(n_jobs, k)) if n_jobs > 1 else None
+
+    def run(function, items):
+        return pool.map(function, items) if pool is not None else [function(item) for item in items]
+
+    # Best (squared radius, series, subsequence) found so far, shared by the searches
+    best = [(np.inf, -1, -1)]
+    lock = threading.Lock()
+
+    def search(j):
+        skip = {j, (j - 1) % k, (j + 1) % k}
+        for i in np.argsort(bounds[j], kind='mergesort'):
+            # Ties are still evaluated so that the result does not depend on the order of the searches
+            if bounds[j][i] > best[0][0]:
+                break
+
+            radius = _radius(stats, j, i, m, fft_length, skip, bounds[j][i], lambda: best[0][0])
+            with lock:
+                if (radius, j, i) < best[0]:
+                    best[0] = (radius, j, i)
+
+    try:
+        bounds = _ring_bounds(stats, m, fft_length, run)
+
+        # Starting with the series holding the smallest bound tightens the best-so-far radius early
+        run(search, sorted(range(k), key=lambda j: np.min(bounds[j])))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    radius, j, i = best[0]
+    return np.sqrt(max(radius, 0)), j, int(i)
@@ -9,21 +9,30 @@ from six.moves import range
 import sys
 import numpy as np
 
+from .result import MatrixProfile
 
-def discords(mp, ex_zone, k=3):
+
+def discords(mp, ex_zone, k=3, av=None):
     """
     Computes the top k discords from a matrix profile
-    :param mp: matrix profile numpy array
+    :param mp: matrix profile numpy array or MatrixProfile
     :param ex_zone: the number of samples to exclude and set to Inf on either side of a found discord
     :param k: the number of discords to discover
+    :param av: optional annotation vector applied to the matrix profile before searching (see annotation_vector)
     :return: list of discord indexes
     Returns a list of indexes represent the discord starting locations. MaxInt indicates there
     were no more discords that could be found due to too many exclusions or profile being too
     small. Discord start indices are sorted by highest matrix profile value.
     """
 
+    if isinstance(mp, MatrixProfile):
+        mp = mp.mp
+
+    if av is not None and len(mp) != len(av):
+        raise ValueError("Annotation Vector must be the same length as the matrix profile")
+
     k = len(mp) if k > len(mp) else k
-    mp_current = np.copy(mp)
+    mp_current = np.copy(mp) if av is None else mp * np.asarray(av)
     d = np.zeros(k)
 
     for i in range(k):
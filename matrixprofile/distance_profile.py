@@ -31,10 +31,13 @@ def naive_distance_profile(ts_a, idx, m, ts_b=None):
     distance_profile = []
     n = len(ts_b)
 
-    for i in range(n - m + 1):
-        distance_profile.append(z_normalize_euclidian(query, ts_b[i:i + m]))
+    # Subsequences containing NaN or inf come out as NaN and are never nearest neighbours
+    with np.errstate(invalid='ignore'):
+        for i in range(n - m + 1):
+            distance_profile.append(z_normalize_euclidian(query, ts_b[i:i + m]))
 
     dp = np.array(distance_profile)
+    dp[~np.isfinite(dp)] = np.inf
 
     if self_join:
         trivial_match_range = (int(max(0, idx - np.round(m / 2, 0))), int(min(idx + np.round(m / 2 + 1, 0), n)))
@@ -43,7 +46,7 @@ def naive_distance_profile(ts_a, idx, m, ts_b=None):
     return dp, np.full(n - m + 1, idx, dtype=float)
 
 
-def mass_distance_profile(ts_a, idx, m, ts_b=None):
+def mass_distance_profile(ts_a, idx, m, ts_b=None, stats=None):
     """
     Return the distance profile of a query within ts_a against the time series ts_b.
     Uses the more efficient MASS comparison. idx defines the starting index of the query
@@ -52,6 +55,7 @@ def mass_distance_profile(ts_a, idx, m, ts_b=None):
     :param idx: Starting index
     :param m:  Query length
     :param ts_b: Second timeseries
+    :param stats: Optional RollingStats of ts_b (of ts_a for a self-join), see mass
     :return: Distance profile
     """
 
@@ -62,7 +66,7 @@ def mass_distance_profile(ts_a, idx, m, ts_b=None):
 
     query = ts_a[idx:(idx + m)]
     n = len(ts_b)
-    distance_profile = np.real(np.sqrt(mass(query, ts_b).astype(complex)))
+    distance_profile = np.real(np.sqrt(mass(query, ts_b, stats).astype(complex)))
     if self_join:
         trivial_match_range = (int(max(0, idx - np.round(m / 2, 0))), int(min(idx + np.round(m / 2 + 1, 0), n)))
         distance_profile[trivial_match_range[0]:trivial_match_range[1]] = np.inf
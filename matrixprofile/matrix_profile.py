@@ -4,50 +4,164 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from multiprocessing.pool import ThreadPool
+
+from six.moves import range
+
 from .distance_profile import naive_distance_profile, mass_distance_profile, stomp_distance_profile
 from . import order
-from .utils import mov_mean_std
+from .utils import RollingStats, mov_mean_std, valid_windows, fill_invalid, sliding_dot_product, _stomp_rows, _n_jobs
 import numpy as np
 
 
-def _matrix_profile(ts_a, m, order_class, distance_profile_function, ts_b=None):
+def _fold_nearest(mp, mp_index, distance_profile, query_segments_id):
+    """
+    Folds a distance profile into a matrix profile and matrix profile index, in place
+    :param mp: Matrix profile
+    :param mp_index: Matrix profile index
+    :param distance_profile: Distance profile of the query
+    :param query_segments_id: Matrix profile index of the query
     """
+    # Check which of the indices have found a new minimum
+    ids_to_update = distance_profile < mp
 
-    :param ts_a:
-    :param m:
-    :param order_class:
-    :param distance_profile_function:
-    :param ts_b:
-    :return:
+    # Update the Matrix Profile Index to indicate that the current index is the minimum location for the aforementioned indices
+    mp_index[ids_to_update] = query_segments_id[ids_to_update]
+
+    # Update the matrix profile to include the new minimum values (where appropriate)
+    np.minimum(mp, distance_profile, out=mp)
+
+
+def _left_right_profiles(n):
     """
-    order = order_class(len(ts_a) - m + 1)
+    Allocates (left mp, left mp index, right mp, right mp index) for a self-join profile of length n
+    """
+    return tuple(np.full(n, np.inf) for _ in range(4))
+
+
+def _fold_k_nearest(mp, mp_index, distance_profile, query_segments_id):
+    """
+    Folds a distance profile into k-nearest-neighbour profiles whose rows are sorted by ascending distance.
+    Only the entries where the new distance beats the current k-th neighbour are touched; for those, the new
+    neighbour is merged in with a stable sort so that, on ties, earlier neighbours keep their rank.
+    :param mp: (n, k) neighbour distances, updated in place
+    :param mp_index: (n, k) neighbour indices, updated in place
+    :param distance_profile: Distance profile of the query
+    :param query_segments_id: Matrix profile index of the query
+    """
+    ids_to_update = np.flatnonzero(distance_profile < mp[:, -1])
+    if len(ids_to_update) == 0:
+        return
+
+    k = mp.shape[1]
+    distances = np.concatenate((mp[ids_to_update], distance_profile[ids_to_update, None]), axis=1)
+    indices = np.concatenate((mp_index[ids_to_update], query_segments_id[ids_to_update, None]), axis=1)
+
+    rows = np.arange(len(ids_to_update))[:, None]
+    ranks = np.argsort(distances, axis=1, kind='mergesort')[:, :k]
+    mp[ids_to_update] = distances[rows, ranks]
+    mp_index[ids_to_update] = indices[rows, ranks]
+
+
+def _iter_matrix_profile(ts_a, m, order_class, distance_profile_function, ts_b=None, chunk_size=None, k=1,
+                         left_right=None):
+    """
+    Generator form of _matrix_profile. Computes the distance profiles in chunks of chunk_size rows and yields
+    (rows_done, rows_total, mp, mp_index) after each chunk, so that a caller can pause, resume or abandon the
+    computation between chunks. The yielded arrays are updated in place by later chunks.
+    :param ts_a: Time series containing the queries
+    :param m: Query length
+    :param order_class: Order in which the distance profiles are calculated
+    :param distance_profile_function: Function returning (distance profile, matrix profile index) for a query
+    :param ts_b: Time series to compare the queries against (None for a self-join)
+    :param chunk_size: Number of distance profiles per chunk (None computes all of them in a single chunk)
+    :param k: Number of nearest neighbours to keep. For k > 1, mp and mp_index have shape (n, k) with the
+    neighbours of every subsequence sorted by ascending distance.
+    :param left_right: Optional (left mp, left mp index, right mp, right mp index) arrays of a self-join, filled
+    in place with the nearest neighbours in the past (left) and in the future (right) of every subsequence
+    :return: Generator of (rows_done, rows_total, mp, mp_index)
+    """
+    rows_total = len(ts_a) - m + 1
+    order = order_class(rows_total)
+    chunk_size = rows_total if chunk_size is None else max(int(chunk_size), 1)
+
+    if k < 1:
+        raise ValueError("k must be at least one")
+
+    if left_right is not None and (ts_b is not None or k != 1):
+        raise ValueError("Left and right matrix profiles are only available for self-joins with k = 1")
+
+    shape = () if k == 1 else (k,)
 
     # Account for the case where ts_b is None (note that ts_b = None triggers a self matrix profile)
     if ts_b is None:
-        mp = np.full(len(ts_a) - m + 1, np.inf)
-        mp_index = np.full(len(ts_a) - m + 1, np.inf)
+        mp = np.full((len(ts_a) - m + 1,) + shape, np.inf)
+        mp_index = np.full((len(ts_a) - m + 1,) + shape, np.inf)
 
     else:
-        mp = np.full(len(ts_b) - m + 1, np.inf)
-        mp_index = np.full(len(ts_b) - m + 1, np.inf)
+        mp = np.full((len(ts_b) - m + 1,) + shape, np.inf)
+        mp_index = np.full((len(ts_b) - m + 1,) + shape, np.inf)
 
+    rows_done = 0
     idx = order.next()
     while idx is not None:
         distance_profile, query_segments_id = distance_profile_function(ts_a, idx, m, ts_b)
 
-        # Check which of the indices have found a new minimum
-        ids_to_update = distance_profile < mp
+        if k == 1:
+            _fold_nearest(mp, mp_index, distance_profile, query_segments_id)
 
-        # Update the Matrix Profile Index to indicate that the current index is the minimum location for the aforementioned indices
-        mp_index[ids_to_update] = query_segments_id[ids_to_update]
+        else:
+            _fold_k_nearest(mp, mp_index, distance_profile, query_segments_id)
+
+        if left_right is not None:
+            # The query is a past neighbour of every later subsequence and a future neighbour of every earlier one
+            left_mp, left_index, right_mp, right_index = left_right
+            _fold_nearest(left_mp[idx + 1:], left_index[idx + 1:], distance_profile[idx + 1:],
+                          query_segments_id[idx + 1:])
+            _fold_nearest(right_mp[:idx], right_index[:idx], distance_profile[:idx], query_segments_id[:idx])
 
-        # Update the matrix profile to include the new minimum values (where appropriate)
-        mp = np.minimum(mp, distance_profile)
         idx = order.next()
 
+        rows_done += 1
+        if rows_done % chunk_size == 0 or idx is None:
+            yield rows_done, rows_total, mp, mp_index
+
+    # An empty profile still produces a (final) chunk
+    if rows_done == 0:
+        yield rows_done, rows_total, mp, mp_index
+
+
+def _exhaust(chunks):
+    """
+    Runs a chunked matrix profile generator to completion
+    :param chunks: Generator of (rows_done, rows_total, mp, mp_index)
+    :return: (matrix profile, matrix profile index)
+    """
+    mp = mp_index = None
+    for _, _, mp, mp_index in chunks:
+        pass
+
     return mp, mp_index
 
 
+def _matrix_profile(ts_a, m, order_class, distance_profile_function, ts_b=None, k=1, left_right=False):
+    """
+
+    :param ts_a:
+    :param m:
+    :param order_class:
+    :param distance_profile_function:
+    :param ts_b:
+    :param k:
+    :param left_right: Also return the left and right matrix profiles and indices
+    :return:
+    """
+    lr = _left_right_profiles(len(ts_a) - m + 1) if left_right else None
+    mp, mp_index = _exhaust(_iter_matrix_profile(ts_a, m, order_class, distance_profile_function, ts_b, k=k,
+                                                 left_right=lr))
+    return (mp, mp_index) + lr if left_right else (mp, mp_index)
+
+
 def _matrix_profile_sampling(ts_a, m, order_class, distance_profile_function, ts_b=None, sampling=0.2):
     """
 
@@ -95,61 +209,144 @@ def _matrix_profile_sampling(ts_a, m, order_class, distance_profile_function, ts
     return mp, mp_index
 
 
-def _matrix_profile_stomp(ts_a, m, order_class, distance_profile_function, ts_b=None):
+def _mass_row_function(distance_profile_function, ts_a, m):
     """
-    Write matrix profile function for STOMP and then consolidate later! (aka link to the previous distance profile)
+    Wraps a MASS distance profile function so that every query shares the RollingStats of the time series it is
+    compared against, built on the first call, instead of rebuilding them per row. The queries and the target are
+    taken from copies of the time series with the non-finite values replaced by zero (made once, and only when
+    there are any), which the distance profile function then uses as they are; the queries that contain
+    non-finite values are at distance inf from every subsequence.
+    :param distance_profile_function: Distance profile function taking a stats keyword, see mass_distance_profile
+    :param ts_a: Time series containing the queries
+    :param m: Query length
+    :return: Distance profile function taking (ts_a, idx, m, ts_b)
+    """
+    valid_a = valid_windows(ts_a, m)
+    ts_a_filled = ts_a if valid_a is None else fill_invalid(ts_a)
+
+    state = {'stats': None, 'ts_b': None}
+
+    def row(ts_a, idx, m, ts_b):
+        if state['stats'] is None:
+            state['stats'] = RollingStats(ts_a if ts_b is None else ts_b)
+            state['ts_b'] = None if ts_b is None else fill_invalid(ts_b)
+
+        if valid_a is not None and not valid_a[idx]:
+            length = len(ts_a if ts_b is None else ts_b) - m + 1
+            return np.full(length, np.inf), np.full(length, idx, dtype=float)
+
+        return distance_profile_function(ts_a_filled, idx, m, state['ts_b'], stats=state['stats'])
+
+    return row
+
+
+def _iter_matrix_profile_mass(ts_a, m, order_class, distance_profile_function, ts_b=None, chunk_size=None, k=1,
+                              left_right=None):
+    """
+    Generator form of stmp, see _iter_matrix_profile
     :param ts_a:
     :param m:
     :param order_class:
     :param distance_profile_function:
     :param ts_b:
-    :return:
+    :param chunk_size:
+    :param k:
+    :param left_right:
+    :return: Generator of (rows_done, rows_total, mp, mp_index)
     """
-    order = order_class(len(ts_a) - m + 1)
+    row = _mass_row_function(distance_profile_function, ts_a, m)
+    return _iter_matrix_profile(ts_a, m, order_class, row, ts_b, chunk_size, k, left_right)
 
-    # Account for the case where ts_b is None (note that ts_b = None triggers a self matrix profile)
-    if ts_b is None:
-        mp = np.full(len(ts_a) - m + 1, np.inf)
-        mp_index = np.full(len(ts_a) - m + 1, np.inf)
 
-    else:
-        mp = np.full(len(ts_b) - m + 1, np.inf)
-        mp_index = np.full(len(ts_b) - m + 1, np.inf)
+def _stomp_row_function(distance_profile_function, ts_a, m):
+    """
+    Wraps a STOMP distance profile function so that it has the same signature as the other distance profile
+    functions. The first and previous sliding dot products are carried between calls, so the wrapped function
+    must be called with the queries in linear order.
+
+    The dot product recurrence would carry a NaN or inf on to every later row, so it runs on copies of the time
+    series with the non-finite values replaced by zero (made only when there are any), and the subsequences that
+    contain them are set to inf on both the query and the target side afterwards.
+    :param distance_profile_function: STOMP distance profile function
+    :param ts_a: Time series containing the queries
+    :param m: Query length
+    :return: Distance profile function taking (ts_a, idx, m, ts_b)
+    """
 
-    idx = order.next()
+    valid_a = valid_windows(ts_a, m)
+    ts_a_filled = ts_a if valid_a is None else fill_invalid(ts_a)
 
     # Get moving mean and standard deviation
-    mean, std = mov_mean_std(ts_a, m)
+    mean, std = RollingStats(ts_a_filled).mean_std(m)
 
-    # Initialize code to set dot_prev to None for the first pass
-    dp = None
+    # dot_first and dot_prev are None for the first pass
+    state = {'dot_first': None, 'dot_prev': None, 'ts_b': None, 'valid_b': None}
 
-    # Initialize dot_first to None for the first pass
-    dot_first = None
+    def row(ts_a, idx, m, ts_b):
+        if ts_b is not None and state['ts_b'] is None:
+            state['valid_b'] = valid_windows(ts_b, m)
+            state['ts_b'] = ts_b if state['valid_b'] is None else fill_invalid(ts_b)
 
-    while idx is not None:
         # Need to pass in the previous sliding dot product for subsequent distance profile calculations
-        (distance_profile, query_segments_id), dot_prev = distance_profile_function(ts_a, idx, m, ts_b, dot_first, dp, mean, std)
+        profile, dot_prev = distance_profile_function(ts_a_filled, idx, m, state['ts_b'], state['dot_first'],
+                                                      state['dot_prev'], mean, std)
 
         if idx == 0:
-            dot_first = dot_prev
+            state['dot_first'] = dot_prev
 
-        # Check which of the indices have found a new minimum
-        ids_to_update = distance_profile < mp
+        state['dot_prev'] = dot_prev
 
-        # Update the Matrix Profile Index to indicate that the current index is the minimum location for the aforementioned indices
-        mp_index[ids_to_update] = query_segments_id[ids_to_update]
+        distance_profile = profile[0]
+        valid_b = valid_a if ts_b is None else state['valid_b']
+        if valid_a is not None and not valid_a[idx]:
+            distance_profile[:] = np.inf
 
-        # Update the matrix profile to include the new minimum values (where appropriate)
-        mp = np.minimum(mp, distance_profile)
-        idx = order.next()
+        elif valid_b is not None:
+            distance_profile[~valid_b] = np.inf
 
-        dp = dot_prev
+        return profile
 
-    return mp, mp_index
+    return row
 
 
-def stampi_update(ts_a, m, mp, mp_index, newval, ts_b=None, distance_profile_function=mass_distance_profile):
+def _iter_matrix_profile_stomp(ts_a, m, order_class, distance_profile_function, ts_b=None, chunk_size=None, k=1,
+                               left_right=None):
+    """
+    Generator form of _matrix_profile_stomp, see _iter_matrix_profile
+    :param ts_a:
+    :param m:
+    :param order_class:
+    :param distance_profile_function:
+    :param ts_b:
+    :param chunk_size:
+    :param k:
+    :param left_right:
+    :return: Generator of (rows_done, rows_total, mp, mp_index)
+    """
+    row = _stomp_row_function(distance_profile_function, ts_a, m)
+    return _iter_matrix_profile(ts_a, m, order_class, row, ts_b, chunk_size, k, left_right)
+
+
+def _matrix_profile_stomp(ts_a, m, order_class, distance_profile_function, ts_b=None, k=1, left_right=False):
+    """
+    Write matrix profile function for STOMP and then consolidate later! (aka link to the previous distance profile)
+    :param ts_a:
+    :param m:
+    :param order_class:
+    :param distance_profile_function:
+    :param ts_b:
+    :param k:
+    :param left_right: Also return the left and right matrix profiles and indices
+    :return:
+    """
+    lr = _left_right_profiles(len(ts_a) - m + 1) if left_right else None
+    mp, mp_index = _exhaust(_iter_matrix_profile_stomp(ts_a, m, order_class, distance_profile_function, ts_b, k=k,
+                                                       left_right=lr))
+    return (mp, mp_index) + lr if left_right else (mp, mp_index)
+
+
+def stampi_update(ts_a, m, mp, mp_index, newval, ts_b=None, distance_profile_function=mass_distance_profile,
+                  stats=None):
     """
     Updates the self-matched matrix profile for a time series Ts_a with the arrival of a new data point newval.
     Note that comparison of two separate time-series with new data arriving will be built later -> currently,
@@ -161,6 +358,8 @@ def stampi_update(ts_a, m, mp, mp_index, newval, ts_b=None, distance_profile_fun
     :param newval:
     :param ts_b:
     :param distance_profile_function:
+    :param stats: Optional RollingStats of ts_a for a self-join (ts_b None). newval is appended to it in place and
+    passed on to distance_profile_function, so a stream of updates never recomputes the rolling statistics.
     :return:
     """
 
@@ -174,7 +373,15 @@ def stampi_update(ts_a, m, mp, mp_index, newval, ts_b=None, distance_profile_fun
     # Determine new index value
     idx = len(ts_a_new) - m
 
-    distance_profile, query_segments_id = distance_profile_function(ts_a_new, idx, m, ts_b)
+    if stats is None:
+        distance_profile, query_segments_id = distance_profile_function(ts_a_new, idx, m, ts_b)
+
+    else:
+        if ts_b is not None or len(stats) != len(ts_a):
+            raise ValueError("stats must hold the rolling statistics of ts_a for a self-join")
+
+        stats.append(newval)
+        distance_profile, query_segments_id = distance_profile_function(ts_a_new, idx, m, ts_b, stats=stats)
 
     # Check which of the indices have found a new minimum
     ids_to_update = distance_profile < mp_new
@@ -187,31 +394,110 @@ def stampi_update(ts_a, m, mp, mp_index, newval, ts_b=None, distance_profile_fun
 
     # Finally, set the last value in the matrix profile to the minimum of the distance profile (with corresponding index)
     mp_final[-1] = np.min(distance_profile)
-    mp_index_new[-1] = np.argmin(distance_profile)
+    mp_index_new[-1] = np.argmin(distance_profile) if np.isfinite(mp_final[-1]) else np.inf
 
     return mp_final, mp_index_new
 
 
-def naive_mp(ts_a, m, ts_b=None):
+def _extend_profile(ts_a, m, mp, mp_index):
+    """
+    Extends the self-join matrix profile of a prefix of ts_a to the whole of ts_a. Only the rows of the new
+    subsequences are computed, with the STOMP dot product recurrence: each row is folded into every column with
+    a vectorized minimum, and by symmetry its own minimum is the matrix profile value of the new subsequence.
+    :param ts_a: Time series whose prefix the matrix profile was computed on
+    :param m: Query length
+    :param mp: Matrix profile of the prefix
+    :param mp_index: Matrix profile index of the prefix
+    :return: (matrix profile, matrix profile index) of ts_a
+    """
+    ts_a = np.asarray(ts_a, dtype=float)
+    n = len(ts_a)
+    length = n - m + 1
+    length_old = len(mp)
+
+    valid = valid_windows(ts_a, m)
+    if valid is not None:
+        ts_a = fill_invalid(ts_a)
+
+    mean, std = mov_mean_std(ts_a, m)
+
+    # The profile is folded as squared distances and the square root taken once at the end
+    mp_new = np.full(length, np.inf)
+    mp_index_new = np.full(length, np.inf)
+    mp_new[:length_old] = np.square(mp)
+    mp_index_new[:length_old] = mp_index
+
+    if length_old >= length:
+        return np.sqrt(mp_new), mp_index_new
+
+    # First new row, and the first column (ts_a[0:m] against every subsequence) for the recurrence
+    dot = sliding_dot_product(ts_a[length_old:length_old + m], ts_a)
+    dot_first = sliding_dot_product(ts_a[:m], ts_a)
+    stats = (mean, std, mean, std, valid, valid)
+
+    for idx, distance_profile in _stomp_rows(ts_a, ts_a, m, stats, dot, dot_first, length_old, length, True):
+        ids_to_update = distance_profile < mp_new
+        mp_index_new[ids_to_update] = idx
+        np.minimum(mp_new, distance_profile, out=mp_new)
+
+        # The row already holds every distance of the new subsequence, including those to the old ones
+        best = np.argmin(distance_profile)
+        mp_new[idx] = distance_profile[best]
+        mp_index_new[idx] = best if np.isfinite(distance_profile[best]) else np.inf
+
+    return np.sqrt(np.maximum(mp_new, 0)), mp_index_new
+
+
+def extend_profile(ts_old, mp, mp_index, new_points, m):
+    """
+    Appends a block of new points to a time series and updates its self-join matrix profile in one call.
+    The cost is proportional to (number of new subsequences) x (total length) instead of the square of the
+    total length, and no arrays are copied per new point as with repeated stampi_update calls.
+    :param ts_old: Time series the matrix profile was computed on
+    :param mp: Matrix profile of ts_old
+    :param mp_index: Matrix profile index of ts_old
+    :param new_points: Points appended to ts_old
+    :param m: Query length
+    :return: (matrix profile, matrix profile index) of the extended time series
+    """
+    if np.ndim(mp) != 1 or np.ndim(mp_index) != 1:
+        raise ValueError("Only nearest neighbour profiles can be extended, k-nearest-neighbour profiles are not "
+                         "supported")
+
+    if len(mp) != len(ts_old) - m + 1:
+        raise ValueError("Matrix profile length does not match the time series and query length")
+
+    ts_a = np.concatenate((np.asarray(ts_old, dtype=float), np.asarray(new_points, dtype=float)))
+    return _extend_profile(ts_a, m, mp, mp_index)
+
+
+def naive_mp(ts_a, m, ts_b=None, left_right=False):
     """
     Naive matrix profile
     :param ts_a:
     :param m:
     :param ts_b:
+    :param left_right: For a self-join, also return the left (nearest neighbour in the past) and right (nearest
+    neighbour in the future) profiles: (mp, mp_index, left_mp, left_index, right_mp, right_index)
     :return:
     """
-    return _matrix_profile(ts_a, m, order.LinearOrder, naive_distance_profile, ts_b)
+    return _matrix_profile(ts_a, m, order.LinearOrder, naive_distance_profile, ts_b, left_right=left_right)
 
 
-def stmp(ts_a, m, ts_b=None):
+def stmp(ts_a, m, ts_b=None, k=1, left_right=False):
     """
 
     :param ts_a:
     :param m:
     :param ts_b:
+    :param k: Number of nearest neighbours per subsequence. For k > 1 the matrix profile and index have shape
+    (n, k), sorted by ascending distance.
+    :param left_right: For a self-join, also return the left (nearest neighbour in the past) and right (nearest
+    neighbour in the future) profiles: (mp, mp_index, left_mp, left_index, right_mp, right_index)
     :return:
     """
-    return _matrix_profile(ts_a, m, order.LinearOrder, mass_distance_profile, ts_b)
+    row = _mass_row_function(mass_distance_profile, ts_a, m)
+    return _matrix_profile(ts_a, m, order.LinearOrder, row, ts_b, k, left_right)
 
 
 def stamp(ts_a, m, ts_b=None, sampling=0.2):
@@ -223,18 +509,91 @@ def stamp(ts_a, m, ts_b=None, sampling=0.2):
     :param sampling:
     :return:
     """
-    return _matrix_profile_sampling(ts_a, m, order.RandomOrder, mass_distance_profile, ts_b, sampling=sampling)
+    row = _mass_row_function(mass_distance_profile, ts_a, m)
+    return _matrix_profile_sampling(ts_a, m, order.RandomOrder, row, ts_b, sampling=sampling)
 
 
-def stomp(ts_a, m, ts_b=None):
+def stomp(ts_a, m, ts_b=None, k=1, left_right=False):
     """
     STOMP
     :param ts_a:
     :param m:
     :param ts_b:
+    :param k: Number of nearest neighbours per subsequence. For k > 1 the matrix profile and index have shape
+    (n, k), sorted by ascending distance.
+    :param left_right: For a self-join, also return the left (nearest neighbour in the past) and right (nearest
+    neighbour in the future) profiles: (mp, mp_index, left_mp, left_index, right_mp, right_index)
     :return:
     """
-    return _matrix_profile_stomp(ts_a, m, order.LinearOrder, stomp_distance_profile, ts_b)
+    return _matrix_profile_stomp(ts_a, m, order.LinearOrder, stomp_distance_profile, ts_b, k, left_right)
+
+
+def _stomp_row_block(query, target, m, stats, dot_first, start, stop, self_join):
+    """
+    Nearest neighbours of the subsequences start to stop of query among the subsequences of target. The first
+    row of the block is computed with an FFT and the others with the STOMP recurrence, so every block is
+    independent of the others.
+    :return: (squared matrix profile, matrix profile index) of the rows of the block
+    """
+    mp = np.full(stop - start, np.inf)
+    mp_index = np.full(stop - start, np.inf)
+
+    dot = sliding_dot_product(query[start:start + m], target)
+    for idx, distance_profile in _stomp_rows(query, target, m, stats, dot, dot_first, start, stop, self_join):
+        best = np.argmin(distance_profile)
+        if np.isfinite(distance_profile[best]):
+            mp[idx - start] = distance_profile[best]
+            mp_index[idx - start] = best
+
+    return mp, mp_index
+
+
+def stomp_parallel(ts_a, m, ts_b=None, n_jobs=None):
+    """
+    STOMP split into independent blocks of rows computed on a thread pool. Every block restarts the dot product
+    recurrence from an FFT of its first row and keeps the minimum of each of its rows, which by symmetry (self-join)
+    or by construction (AB-join) is the matrix profile value of that row. Same output as stomp.
+    :param ts_a: Time series containing the queries
+    :param m: Query length
+    :param ts_b: Second time series (None for a self-join)
+    :param n_jobs: Number of threads (None for 1, -1 for one per core)
+    :return: (matrix profile, matrix profile index)
+    """
+    # The profile is indexed by the subsequences of ts_b, whose nearest neighbours are searched in ts_a
+    query = np.asarray(ts_a if ts_b is None else ts_b, dtype=float)
+    target = np.asarray(ts_a, dtype=float)
+    length = len(query) - m + 1
+
+    valid_q = valid_windows(query, m)
+    valid_t = valid_q if ts_b is None else valid_windows(target, m)
+    query = query if valid_q is None else fill_invalid(query)
+    target = target if valid_t is None else fill_invalid(target)
+
+    mean_q, std_q = mov_mean_std(query, m)
+    mean_t, std_t = (mean_q, std_q) if ts_b is None else mov_mean_std(target, m)
+    stats = (mean_q, std_q, mean_t, std_t, valid_q, valid_t)
+    dot_first = sliding_dot_product(target[:m], query)
+
+    n_jobs = min(_n_jobs(n_jobs), max(length, 1))
+    bounds = np.linspace(0, length, n_jobs + 1).astype(int)
+
+    def block(i):
+        return _stomp_row_block(query, target, m, stats, dot_first, bounds[i], bounds[i + 1], ts_b is None)
+
+    if n_jobs == 1:
+        blocks = [block(0)]
+
+    else:
+        pool = ThreadPool(n_jobs)
+        try:
+            blocks = pool.map(block, range(n_jobs))
+        finally:
+            pool.close()
+            pool.join()
+
+    mp = np.concatenate([b[0] for b in blocks])
+    mp_index = np.concatenate([b[1] for b in blocks])
+    return np.sqrt(np.maximum(mp, 0)), mp_index
 
 
 if __name__ == "__main__":
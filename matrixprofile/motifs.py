@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from six.moves import range
+
+import sys
+import numpy as np
+
+from .result import MatrixProfile
+
+
+def motifs(mp, ex_zone, k=3, av=None):
+    """
+    Computes the top k motifs from a matrix profile
+    :param mp: matrix profile numpy array or MatrixProfile
+    :param ex_zone: the number of samples to exclude and set to Inf on either side of a found motif
+    :param k: the number of motifs to discover
+    :param av: optional annotation vector (see annotation_vector). Entries are penalized by (1 - av) times the
+    largest matrix profile value, so that suppressed subsequences are not reported as motifs.
+    :return: list of motif indexes
+    Returns a list of indexes represent the motif starting locations. MaxInt indicates there
+    were no more motifs that could be found due to too many exclusions or profile being too
+    small. Motif start indices are sorted by lowest matrix profile value.
+    """
+
+    if isinstance(mp, MatrixProfile):
+        mp = mp.mp
+
+    if av is not None and len(mp) != len(av):
+        raise ValueError("Annotation Vector must be the same length as the matrix profile")
+
+    k = len(mp) if k > len(mp) else k
+    mp_current = np.array(mp, dtype=float)
+    finite = np.isfinite(mp_current)
+    mp_current[~finite] = np.inf
+
+    if av is not None and finite.any():
+        mp_current += (1 - np.asarray(av)) * np.max(mp_current[finite])
+
+    d = np.full(k, sys.maxsize, dtype=float)
+
+    for i in range(k):
+        min_idx = int(np.argmin(mp_current))
+        if np.isinf(mp_current[min_idx]):
+            break
+
+        d[i] = min_idx
+        mp_current[max([min_idx - ex_zone, 0]):min([min_idx + ex_zone, len(mp_current)])] = np.inf
+
+    return d
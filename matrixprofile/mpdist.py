@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from multiprocessing.pool import ThreadPool
+
+from six.moves import range
+
+import numpy as np
+
+from .utils import mov_mean_std, valid_windows, fill_invalid, next_fast_len, _rfft, _irfft, _stomp_rows, _n_jobs
+
+
+class _SeriesStats(object):
+    """
+    Everything an AB-join needs from one series, computed once per series: the valid windows, the rolling
+    statistics, the spectrum of the series and the spectrum of its reversed first subsequence, both at a common
+    FFT length
+    """
+    __slots__ = ('ts', 'valid', 'mean', 'std', 'spectrum', 'first_spectrum')
+
+    def __init__(self, ts, m, fft_length):
+        # NaN and inf are replaced by zero for the dot products, and the windows holding them are flagged
+        ts = np.asarray(ts, dtype=float)
+        self.valid = valid_windows(ts, m)
+        self.ts = ts if self.valid is None else fill_invalid(ts)
+        self.mean, self.std = mov_mean_std(self.ts, m)
+        self.spectrum = _rfft(self.ts, fft_length)
+        self.first_spectrum = _rfft(self.ts[:m][::-1], fft_length)
+
+
+def _ab_join(stats_a, stats_b, m, fft_length):
+    """
+    One-pass STOMP AB-join returning the profile of ts_a against ts_b and of ts_b against ts_a
+    :param stats_a: _SeriesStats of ts_a
+    :param stats_b: _SeriesStats of ts_b
+    :param m: Subsequence length
+    :param fft_length: FFT length the spectra were computed at
+    :return: (mp of ts_a against ts_b, mp of ts_b against ts_a)
+    """
+    a, b = stats_a.ts, stats_b.ts
+    n_a, n_b = len(a), len(b)
+    l_a, l_b = n_a - m + 1, n_b - m + 1
+
+    # First row (a[0:m] against every subsequence of b) and first column (b[0:m] against every subsequence of a)
+    dot_row = _irfft(stats_b.spectrum * stats_a.first_spectrum, fft_length)[m - 1:n_b]
+    dot_col = _irfft(stats_a.spectrum * stats_b.first_spectrum, fft_length)[m - 1:n_a]
+
+    mp_ab = np.empty(l_a)
+    mp_ba = np.full(l_b, np.inf)
+
+    # Squared distances; the square root is taken once at the end
+    stats = (stats_a.mean, stats_a.std, stats_b.mean, stats_b.std, stats_a.valid, stats_b.valid)
+    for idx, distance_profile in _stomp_rows(a, b, m, stats, np.copy(dot_row), dot_col, 0, l_a, False):
+        mp_ab[idx] = np.min(distance_profile)
+        np.minimum(mp_ba, distance_profile, out=mp_ba)
+
+    return np.sqrt(np.maximum(mp_ab, 0)), np.sqrt(np.maximum(mp_ba, 0))
+
+
+def _mpdist_from_profiles(mp_ab, mp_ba, threshold, n_a, n_b):
+    """
+    MPdist is the k-th smallest value of the joined AB and BA profiles, with k a fraction of the total length.
+    Subsequences holding NaN or inf have no nearest neighbour and are left out.
+    """
+    p_abba = np.concatenate((mp_ab, mp_ba))
+    p_abba = p_abba[np.isfinite(p_abba)]
+    if len(p_abba) == 0:
+        return np.inf
+
+    k = min(int(np.ceil(threshold * (n_a + n_b))), len(p_abba) - 1)
+    return np.partition(p_abba, k)[k]
+
+
+def mpdist(ts_a, ts_b, m, threshold=0.05):
+    """
+    Matrix profile distance (MPdist) between two time series: two series are close when most of the
+    subsequences of each one have a close match somewhere in the other one
+    :param ts_a: First time series
+    :param ts_b: Second time series
+    :param m: Subsequence length
+    :param threshold: Fraction of the combined length of the series that selects the reported profile value
+    :return: MPdist
+    """
+    fft_length = next_fast_len(max(len(ts_a), len(ts_b)))
+    stats_a = _SeriesStats(ts_a, m, fft_length)
+    stats_b = _SeriesStats(ts_b, m, fft_length)
+    mp_ab, mp_ba = _ab_join(stats_a, stats_b, m, fft_length)
+    return _mpdist_from_profiles(mp_ab, mp_ba, threshold, len(stats_a.ts), len(stats_b.ts))
+
+
+def pairwise_mpdist(series, m, threshold=0.05, n_jobs=None):
+    """
+    MPdist between every pair of a collection of time series. The rolling statistics and spectra of every series
+    are computed once and shared by all of its pairs, and the pairs are joined on a thread pool.
+    :param series: List of time series (lengths may differ)
+    :param m: Subsequence length
+    :param threshold: See mpdist
+    :param n_jobs: Number of threads (None for 1, -1 for one per core)
+    :return: Condensed distance matrix, ordered like scipy.spatial.distance.pdist
+    """
+    if len(series) < 2:
+        return np.empty(0)
+
+    fft_length = next_fast_len(max(len(ts) for ts in series))
+    stats = [_SeriesStats(ts, m, fft_length) for ts in series]
+
+    pairs = [(i, j) for i in range(len(series)) for j in range(i + 1, len(series))]
+
+    def distance(pair):
+        i, j = pair
+        mp_ab, mp_ba = _ab_join(stats[i], stats[j], m, fft_length)
+        return _mpdist_from_profiles(mp_ab, mp_ba, threshold, len(stats[i].ts), len(stats[j].ts))
+
+    n_jobs = _n_jobs(n_jobs)
+    if n_jobs == 1:
+        return np.array([distance(pair) for pair in pairs])
+
+    pool = ThreadPool(n_jobs)
+    try:
+        return np.array(pool.map(distance, pairs))
+    finally:
+        pool.close()
+        pool.join()
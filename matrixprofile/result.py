@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import struct
+
+import numpy as np
+
+from .utils import series_hash
+
+
+# File layout: magic, format version, header length, JSON header, then the arrays at 64-byte aligned offsets
+MAGIC = b"MPRF"
+VERSION = 1
+_PREAMBLE = struct.Struct(str("<4sHI"))
+_ALIGN = 64
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def to_float_index(mp_index):
+    """
+    Matrix profile index as the engines return it: floats, with inf for the entries that have no nearest neighbour.
+    The integer index of a compact profile, which marks those entries with -1, is converted; a float index is
+    returned as is.
+    :param mp_index: Matrix profile index
+    :return: Float matrix profile index
+    """
+    mp_index = np.asarray(mp_index)
+    if mp_index.dtype.kind != 'i':
+        return mp_index
+
+    return np.where(mp_index >= 0, mp_index, np.inf)
+
+
+class MatrixProfile(object):
+    """
+    Matrix profile result: the profile and index arrays plus the metadata needed to interpret them.
+
+    Unpacks and indexes like the (mp, mp_index) tuple returned by the engines, so it can be passed wherever such a
+    tuple is expected. Profiles written with compact=True store the index as integers, with -1 marking entries that
+    have no nearest neighbour. load() keeps that index memory-mapped as stored; to_float_index turns it back into
+    the engines' float index, with inf for those entries, where a consumer needs one.
+    """
+    __slots__ = ('mp', 'mp_index', 'm', 'join', 'algorithm', 'input_hash')
+
+    def __init__(self, mp, mp_index, m=None, join='self', algorithm=None, input_hash=None):
+        """
+        :param mp: Matrix profile
+        :param mp_index: Matrix profile index
+        :param m: Subsequence length
+        :param join: 'self' for a self-join, 'ab' for a join between two series
+        :param algorithm: Name of the engine that computed the profile
+        :param input_hash: Content hash of the input series (see utils.series_hash)
+        """
+        self.mp = mp
+        self.mp_index = mp_index
+        self.m = None if m is None else int(m)
+        self.join = join
+        self.algorithm = algorithm
+        self.input_hash = input_hash
+
+    @classmethod
+    def from_engine(cls, result, ts_a, m, ts_b=None, algorithm=None):
+        """
+        Wraps the (mp, mp_index) tuple returned by an engine
+        :param result: (mp, mp_index)
+        :param ts_a: Time series containing the queries
+        :param m: Subsequence length
+        :param ts_b: Second time series (None for a self-join)
+        :param algorithm: Name of the engine
+        :return: MatrixProfile
+        """
+        mp, mp_index = result
+        if ts_b is None:
+            return cls(mp, mp_index, m, 'self', algorithm, series_hash(ts_a))
+
+        return cls(mp, mp_index, m, 'ab', algorithm, series_hash(ts_a) + ':' + series_hash(ts_b))
+
+    def __iter__(self):
+        return iter((self.mp, self.mp_index))
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, item):
+        return (self.mp, self.mp_index)[item]
+
+    def __repr__(self):
+        return "MatrixProfile(n={}, m={}, join={!r}, algorithm={!r})".format(
+            len(self.mp), self.m, str(self.join), None if self.algorithm is None else str(self.algorithm))
+
+    @property
+    def metadata(self):
+        """
+        Metadata as a dictionary
+        """
+        return {'m': self.m, 'join': self.join, 'algorithm': self.algorithm, 'input_hash': self.input_hash}
+
+    def save(self, path, compact=False):
+        """
+        Writes the profile to a versioned binary file that load() can memory-map
+        :param path: Output file
+        :param compact: Store the profile as float32 and the index as int32 (int64 for very long profiles)
+        """
+        mp = np.asarray(self.mp)
+        mp_index = np.asarray(self.mp_index)
+
+        if compact:
+            mp = mp.astype(np.float32)
+            if mp_index.dtype.kind == 'f':
+                index_dtype = np.int32 if len(mp_index) < 2 ** 31 else np.int64
+                mp_index = np.where(np.isfinite(mp_index), mp_index, -1).astype(index_dtype)
+
+        arrays = [('mp', np.ascontiguousarray(mp)), ('mp_index', np.ascontiguousarray(mp_index))]
+        header = {'metadata': self.metadata, 'arrays': []}
+
+        # Array offsets are relative to the first aligned position after the header
+        offset = 0
+        for name, array in arrays:
+            header['arrays'].append({'name': name, 'dtype': array.dtype.str, 'shape': list(array.shape),
+                                     'offset': offset})
+            offset = _aligned(offset + array.nbytes)
+
+        encoded = json.dumps(header).encode('utf-8')
+        data_start = _aligned(_PREAMBLE.size + len(encoded))
+
+        with open(path, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+            f.write(encoded)
+            for entry, (name, array) in zip(header['arrays'], arrays):
+                f.seek(data_start + entry['offset'])
+                f.write(array.tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True, float_index=False):
+        """
+        Reads a profile written by save()
+        :param path: Input file
+        :param mmap: Memory-map the arrays read-only instead of reading them into memory
+        :param float_index: Convert the integer index of a compact profile to the engines' float index (see
+        to_float_index), which reads it into memory as float64
+        :return: MatrixProfile
+        """
+        with open(path, 'rb') as f:
+            magic, version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError("{} is not a matrix profile file".format(path))
+
+            if version > VERSION:
+                raise ValueError("Unsupported matrix profile file version {}".format(version))
+
+            header = json.loads(f.read(header_length).decode('utf-8'))
+            data_start = _aligned(_PREAMBLE.size + header_length)
+
+            arrays = {}
+            for entry in header['arrays']:
+                dtype = np.dtype(str(entry['dtype']))
+                shape = tuple(entry['shape'])
+                if mmap:
+                    # np.memmap refuses empty arrays
+                    if int(np.prod(shape)) == 0:
+                        arrays[entry['name']] = np.zeros(shape, dtype=dtype)
+                    else:
+                        arrays[entry['name']] = np.memmap(path, dtype=dtype, mode='r', shape=shape,
+                                                          offset=data_start + entry['offset'])
+                else:
+                    f.seek(data_start + entry['offset'])
+                    arrays[entry['name']] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+        mp_index = arrays['mp_index']
+        if float_index:
+            mp_index = to_float_index(mp_index)
+
+        return cls(arrays['mp'], mp_index, **header['metadata'])
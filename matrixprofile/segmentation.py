@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from six.moves import range
+
+import numpy as np
+
+from .matrix_profile import stampi_update
+from .result import to_float_index
+from .utils import RollingStats
+
+
+def _arc_endpoints(mp_index):
+    """
+    Returns the start and end of every arc i -> mp_index[i], skipping entries without a nearest neighbour
+    :param mp_index: Matrix profile index, either the engines' float index or the integer index of a compact profile
+    :return: (arc starts, arc ends) with start <= end
+    """
+    mp_index = np.asarray(mp_index)
+    sources = np.flatnonzero(np.isfinite(mp_index) & (mp_index >= 0))
+    targets = mp_index[sources].astype(np.int64)
+    return np.minimum(sources, targets), np.maximum(sources, targets)
+
+
+def _arc_diff(starts, ends, n, weight=1):
+    """
+    Difference array of the arc counts: its cumulative sum is the number of arcs passing over every index
+    :param starts: Arc starts
+    :param ends: Arc ends
+    :param n: Length of the matrix profile index
+    :param weight: +1 to add the arcs, -1 to remove them
+    :return: Difference array of length n + 1
+    """
+    return weight * (np.bincount(starts, minlength=n + 1) - np.bincount(ends, minlength=n + 1))
+
+
+def _ideal_arc_curve(n):
+    """
+    Number of arcs expected to pass over every index when the nearest neighbours are placed at random,
+    a parabola peaking at n / 2
+    :param n: Length of the matrix profile index
+    :return: Idealized arc curve
+    """
+    i = np.arange(n, dtype=float)
+    return 2 * i * (n - i) / n
+
+
+def _correct_arc_curve(arc_counts, n, m, excl_factor):
+    """
+    Normalizes arc counts by the idealized arc curve and masks the edges of the series
+    :param arc_counts: Number of arcs passing over every index
+    :param n: Length of the matrix profile index
+    :param m: Subsequence length
+    :param excl_factor: Number of subsequence lengths to mask at each edge
+    :return: Corrected arc curve
+    """
+    ideal = _ideal_arc_curve(n)
+    cac = np.ones(n)
+    np.divide(arc_counts, ideal, out=cac, where=ideal > 0)
+    np.minimum(cac, 1.0, out=cac)
+
+    edge = min(int(excl_factor * m), n)
+    cac[:edge] = 1.0
+    cac[n - edge:] = 1.0
+    return cac
+
+
+def arc_curve(mp_index):
+    """
+    Counts the number of nearest neighbour arcs i -> mp_index[i] passing over every index of the matrix profile.
+    Computed in O(n) from a difference array of the arc endpoints.
+    :param mp_index: Matrix profile index
+    :return: Arc counts
+    """
+    n = len(mp_index)
+    starts, ends = _arc_endpoints(mp_index)
+    return np.cumsum(_arc_diff(starts, ends, n))[:n]
+
+
+def corrected_arc_curve(mp_index, m, excl_factor=5):
+    """
+    Computes the corrected arc curve (CAC) used by FLUSS. Values near 0 indicate that few subsequences have
+    their nearest neighbour on the other side of an index, i.e. a likely regime change. The first and last
+    excl_factor * m entries are set to 1.
+    :param mp_index: Matrix profile index
+    :param m: Subsequence length
+    :param excl_factor: Number of subsequence lengths to mask at each edge
+    :return: Corrected arc curve
+    """
+    return _correct_arc_curve(arc_curve(mp_index), len(mp_index), m, excl_factor)
+
+
+def regimes(cac, n_regimes, ex_zone):
+    """
+    Extracts the regime boundaries from a corrected arc curve
+    :param cac: Corrected arc curve
+    :param n_regimes: Number of regimes; n_regimes - 1 boundaries are returned
+    :param ex_zone: Number of samples to exclude on either side of a found boundary
+    :return: Boundary indices sorted by ascending corrected arc curve value. Fewer boundaries are returned when
+    the exclusion zones cover the whole curve.
+    """
+    cac = np.array(cac, dtype=float)
+    boundaries = []
+
+    for _ in range(n_regimes - 1):
+        idx = int(np.argmin(cac))
+        if not cac[idx] < 1.0:
+            break
+
+        boundaries.append(idx)
+        cac[max(idx - ex_zone, 0):min(idx + ex_zone, len(cac))] = np.inf
+
+    return np.array(boundaries, dtype=int)
+
+
+def fluss(mp_index, m, n_regimes, excl_factor=5):
+    """
+    Fast Low-cost Unipotent Semantic Segmentation (FLUSS)
+    :param mp_index: Matrix profile index
+    :param m: Subsequence length
+    :param n_regimes: Number of regimes to segment the series into
+    :param excl_factor: Number of subsequence lengths masked at the edges and around every boundary
+    :return: (corrected arc curve, regime boundaries)
+    """
+    cac = corrected_arc_curve(mp_index, m, excl_factor)
+    return cac, regimes(cac, n_regimes, int(excl_factor * m))
+
+
+class Floss(object):
+    """
+    Fast Low-cost Online Semantic Segmentation (FLOSS). Keeps the matrix profile of a growing series up to date
+    with stampi_update, whose rolling statistics are kept across updates, and maintains the arc counts
+    incrementally: only the arcs of matrix profile index entries that changed are removed and re-added, so an
+    update costs the stampi_update plus O(n) vectorized work.
+    """
+
+    def __init__(self, ts, m, mp, mp_index, excl_factor=5):
+        """
+        :param ts: Time series seen so far
+        :param m: Subsequence length
+        :param mp: Self-join matrix profile of ts
+        :param mp_index: Self-join matrix profile index of ts
+        :param excl_factor: Number of subsequence lengths masked at the edges of the corrected arc curve
+        """
+        self.ts = np.asarray(ts, dtype=float)
+        self.m = m
+        self.mp = np.asarray(mp, dtype=float)
+        self.mp_index = np.asarray(to_float_index(mp_index), dtype=float)
+        self.excl_factor = excl_factor
+        self._stats = RollingStats(self.ts)
+
+        starts, ends = _arc_endpoints(self.mp_index)
+        self._diff = _arc_diff(starts, ends, len(self.mp_index))
+
+    @property
+    def cac(self):
+        """
+        Corrected arc curve of the series seen so far
+        """
+        n = len(self.mp_index)
+        return _correct_arc_curve(np.cumsum(self._diff)[:n], n, self.m, self.excl_factor)
+
+    def update(self, newval):
+        """
+        Appends a new data point and updates the matrix profile and the arc counts
+        :param newval: New data point
+        :return: Corrected arc curve after the update
+        """
+        mp, mp_index = stampi_update(self.ts, self.m, self.mp, self.mp_index, newval, stats=self._stats)
+        n = len(mp_index)
+
+        # Arcs whose nearest neighbour changed, and the arc of the new subsequence
+        old_index = np.append(self.mp_index, np.nan)
+        changed = ~(mp_index == old_index)
+
+        stale = np.where(changed, old_index, np.nan)
+        fresh = np.where(changed, mp_index, np.nan)
+
+        # Arcs never end past the last subsequence, so the old difference array carries over unchanged
+        diff = np.zeros(n + 1, dtype=self._diff.dtype)
+        diff[:n] = self._diff
+
+        starts, ends = _arc_endpoints(stale)
+        diff += _arc_diff(starts, ends, n, -1)
+        starts, ends = _arc_endpoints(fresh)
+        diff += _arc_diff(starts, ends, n)
+
+        self.ts = np.append(self.ts, newval)
+        self.mp, self.mp_index, self._diff = mp, mp_index, diff
+        return self.cac
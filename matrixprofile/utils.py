@@ -4,8 +4,35 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import hashlib
+import multiprocessing
+
+from six.moves import range
+
 import numpy as np
 import numpy.fft as fft
+from numpy.lib.stride_tricks import as_strided
+
+try:
+    import scipy.fft as _fft_backend
+except ImportError:
+    _fft_backend = None
+
+
+# Queries up to this length are correlated directly, which beats an FFT for short queries
+_DIRECT_MAX_QUERY = 32
+
+# Overlap-save block length as a multiple of the query length
+_BLOCK_FACTOR = 4
+
+# Number of values transformed at once by the overlap-save FFT
+_FFT_GROUP_ELEMENTS = 2 ** 20
+
+# Points per block of the RollingStats prefix sums
+_ROLLING_BLOCK = 256
+
+# Windows whose variance is below this fraction of their mean square are recomputed directly
+_ILL_CONDITIONED = 1e-6
 
 
 def z_normalize(ts):
@@ -39,27 +66,275 @@ def z_normalize_euclidian(ts_a, ts_b):
     return np.linalg.norm(z_normalize(ts_a.astype("float64")) - z_normalize(ts_b.astype("float64")))
 
 
+def mov_sum(ts, m):
+    """
+    Calculate the sum within a moving window of width m passing across the time series ts
+    :param ts: Timeseries
+    :param m: Window width
+    :return: Moving sum
+    """
+
+    # Add zero to the beginning of the cumsum of ts
+    s = np.concatenate(([0], np.cumsum(ts)))
+    return s[m:] - s[:-m]
+
+
+def valid_windows(ts, m):
+    """
+    Flag the windows of width m passing across the time series ts that contain only finite values
+    :param ts: Timeseries
+    :param m: Window width
+    :return: Boolean array with one entry per window, or None when every value of ts is finite
+    """
+
+    finite = np.isfinite(ts)
+    if finite.all():
+        return None
+
+    return mov_sum(~finite, m) == 0
+
+
+def fill_invalid(ts):
+    """
+    Replace the non-finite values of ts by zero. Returns ts itself (no copy) when every value is finite.
+    :param ts: Timeseries
+    :return: Timeseries without NaN or inf
+    """
+
+    finite = np.isfinite(ts)
+    if finite.all():
+        return ts
+
+    return np.where(finite, ts, 0.0)
+
+
+def _compensated_cumsum(totals, hi, lo, out_hi, out_lo):
+    """
+    Neumaier-compensated running sums of totals starting from hi + lo, written to out_hi and out_lo
+    (one entry per total, holding the sum including it)
+    """
+    for i, total in enumerate(totals.tolist()):
+        s = hi + total
+        if abs(hi) >= abs(total):
+            lo += (hi - s) + total
+        else:
+            lo += (total - s) + hi
+        hi = s
+        out_hi[i] = hi
+        out_lo[i] = lo
+
+
+class RollingStats(object):
+    """
+    Rolling mean and standard deviation of a time series, for any window length, that points can be appended to.
+
+    The series is shifted by the mean of its first finite values, which removes the large offsets that make the
+    sum of squares cancel catastrophically. Prefix sums of the shifted values and of their squares are kept per
+    block of _ROLLING_BLOCK points, and the block offsets are accumulated with Neumaier compensation, so the
+    rounding error of a window sum does not grow with the position of the window. Windows that are still ill
+    conditioned (a variance tiny compared to the mean square, e.g. constant windows) are summed again around a
+    local centre, in O(n) overall.
+
+    Building is O(n), appending a point O(1) amortized, and querying a window length O(n). The last query is kept
+    until points are appended, so the engines that query the same window length for every row pay for it once.
+    Non-finite values are counted per window and give a NaN mean and standard deviation to the windows that hold
+    them, like mov_mean_std.
+    """
+    __slots__ = ('_n', '_shift', '_values', '_bad', '_local', '_local_sq', '_offset', '_offset_lo', '_offset_sq',
+                 '_offset_sq_lo', '_last')
+
+    def __init__(self, ts=None):
+        """
+        :param ts: Initial time series (None for an empty one)
+        """
+        self._n = 0
+        self._shift = None
+        self._values = np.empty(0)
+        self._bad = np.zeros(1, dtype=np.int64)
+        self._local = np.zeros(1)
+        self._local_sq = np.zeros(1)
+        self._offset = np.zeros(1)
+        self._offset_lo = np.zeros(1)
+        self._offset_sq = np.zeros(1)
+        self._offset_sq_lo = np.zeros(1)
+        self._last = None
+
+        if ts is not None:
+            self.extend(ts)
+
+    def __len__(self):
+        return self._n
+
+    def _reserve(self, n):
+        """
+        Grows the buffers geometrically so that they hold n points
+        """
+        if len(self._values) >= n:
+            return
+
+        capacity = max(n, 2 * len(self._values))
+        blocks = capacity // _ROLLING_BLOCK + 1
+        for name, size in (('_values', capacity), ('_bad', capacity + 1), ('_local', capacity + 1),
+                           ('_local_sq', capacity + 1), ('_offset', blocks), ('_offset_lo', blocks),
+                           ('_offset_sq', blocks), ('_offset_sq_lo', blocks)):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def append(self, value):
+        """
+        Appends one point
+        :param value: New point
+        :return: self
+        """
+        return self.extend([value])
+
+    def extend(self, values):
+        """
+        Appends points. Only the block holding the end of the series and the new blocks are summed.
+        :param values: New points
+        :return: self
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0:
+            return self
+
+        finite = np.isfinite(values)
+        if self._shift is None and finite.any():
+            self._shift = float(np.mean(values[finite]))
+
+        n0 = self._n
+        n1 = n0 + len(values)
+        self._reserve(n1)
+
+        # Non-finite values are stored as zero and counted
+        self._values[n0:n1] = np.where(finite, values - (self._shift or 0.0), 0.0)
+        self._bad[n0 + 1:n1 + 1] = self._bad[n0] + np.cumsum(~finite)
+
+        # Prefix index k lies in block k // B, whose local sum holds the points of the block before k
+        block = _ROLLING_BLOCK
+        start = (n0 // block) * block
+        first = start // block
+        blocks = (n1 - start) // block + 1
+
+        padded = np.zeros(blocks * block)
+        padded[:n1 - start] = self._values[start:n1]
+        padded = padded.reshape(blocks, block)
+
+        for local, offset, offset_lo, squares in ((self._local, self._offset, self._offset_lo, False),
+                                                  (self._local_sq, self._offset_sq, self._offset_sq_lo, True)):
+            sums = np.zeros((blocks, block + 1))
+            np.cumsum(padded ** 2 if squares else padded, axis=1, out=sums[:, 1:])
+            local[start:n1 + 1] = sums[:, :block].ravel()[:n1 + 1 - start]
+
+            # The totals of the completed blocks give the offsets of the following ones
+            _compensated_cumsum(sums[:-1, block], offset[first], offset_lo[first],
+                                offset[first + 1:first + blocks], offset_lo[first + 1:first + blocks])
+
+        self._n = n1
+        return self
+
+    def _window_sums(self, local, offset, offset_lo, m):
+        """
+        Sums of every window of width m from the prefix sums, adding the differences of the block offsets, of their
+        compensations and of the local sums separately
+        """
+        n = self._n
+        blocks = n // _ROLLING_BLOCK + 1
+        sums = local[m:n + 1] - local[:n - m + 1]
+        for offsets in (offset_lo, offset):
+            prefix = np.repeat(offsets[:blocks], _ROLLING_BLOCK)[:n + 1]
+            sums += prefix[m:] - prefix[:-m]
+
+        return sums
+
+    def valid(self, m):
+        """
+        Flags the windows of width m that contain only finite values
+        :param m: Window width
+        :return: Boolean array with one entry per window, or None when every value is finite
+        """
+        if self._bad[self._n] == 0:
+            return None
+
+        return self._bad[m:self._n + 1] == self._bad[:self._n - m + 1]
+
+    def mean_std(self, m):
+        """
+        Mean and standard deviation of every window of width m
+        :param m: Window width
+        :return: (moving mean, moving std dev)
+        """
+        if m <= 1:
+            raise ValueError("Query length must be longer than one")
+
+        length = self._n - m + 1
+        if length < 1:
+            return np.empty(0), np.empty(0)
+
+        if self._last is not None and self._last[:2] == (self._n, m):
+            return self._last[2].copy(), self._last[3].copy()
+
+        mean = self._window_sums(self._local, self._offset, self._offset_lo, m) / m
+        mean_sq = self._window_sums(self._local_sq, self._offset_sq, self._offset_sq_lo, m) / m
+        var = mean_sq - mean ** 2
+
+        valid = self.valid(m)
+        ill = var <= _ILL_CONDITIONED * mean_sq
+        if valid is not None:
+            ill &= valid
+
+        ill = np.flatnonzero(ill)
+        if len(ill):
+            # The windows are taken in groups of m consecutive ones, whose 2m - 1 points are centred on the mean of
+            # the first window of the group and summed again. Every point falls in at most two groups, so this
+            # stays O(n) however many windows are flagged
+            values = np.concatenate((self._values[:self._n], np.zeros(m)))
+            groups = ill // m
+            groups = groups[np.concatenate(([True], groups[1:] != groups[:-1]))]
+            span = np.arange(2 * m - 1)
+            step = max(1, _FFT_GROUP_ELEMENTS // (2 * m))
+            for i in range(0, len(groups), step):
+                group = groups[i:i + step]
+                windows = values[group[:, None] * m + span]
+                centre = np.mean(windows[:, :m], axis=1, keepdims=True)
+                windows -= centre
+
+                sums = np.zeros((len(group), 2 * m))
+                sums_sq = np.zeros((len(group), 2 * m))
+                np.cumsum(windows, axis=1, out=sums[:, 1:])
+                np.cumsum(windows ** 2, axis=1, out=sums_sq[:, 1:])
+                local_mean = (sums[:, m:] - sums[:, :m]) / m
+                local_var = (sums_sq[:, m:] - sums_sq[:, :m]) / m - local_mean ** 2
+
+                index = (group[:, None] * m + np.arange(m)).ravel()
+                keep = index < length
+                mean[index[keep]] = (centre + local_mean).ravel()[keep]
+                var[index[keep]] = local_var.ravel()[keep]
+
+        mean += self._shift or 0.0
+        std = np.sqrt(np.maximum(var, 0))
+
+        if valid is not None:
+            mean[~valid] = np.nan
+            std[~valid] = np.nan
+
+        self._last = (self._n, m, mean, std)
+        return mean.copy(), std.copy()
+
+
 def mov_mean_std(ts, m):
     """
-    Calculate the mean and standard deviation within a moving window of width m passing across the time series ts
+    Calculate the mean and standard deviation within a moving window of width m passing across the time series ts.
+    Windows containing NaN or inf get a NaN mean and standard deviation without affecting the other windows.
+    See RollingStats, which this wraps.
     :param ts:
     :param m:
     :return: (moving mean, moving std dev)
     """
 
-    if m <= 1:
-        raise ValueError("Query length must be longer than one")
-
-    ts = ts.astype("float")
-
-    # Add zero to the beginning of the cumsum of ts
-    s = np.insert(np.cumsum(ts), 0, 0)
-
-    # Add zero to the beginning of the cumsum of ts ** 2
-    s_sq = np.insert(np.cumsum(ts ** 2), 0, 0)
-    seg_sum = s[m:] - s[:-m]
-    seg_sum_sq = s_sq[m:] - s_sq[:-m]
-    return seg_sum / m, np.sqrt(seg_sum_sq / m - (seg_sum / m) ** 2)
+    return RollingStats(ts).mean_std(m)
 
 
 def mov_std(ts, m):
@@ -70,57 +345,175 @@ def mov_std(ts, m):
     :return: Std dev
     """
 
-    if m <= 1:
-        raise ValueError("Query length must be longer than one")
+    return mov_mean_std(ts, m)[1]
 
-    ts = ts.astype("float")
-    # Add zero to the beginning of the cumsum of ts
-    s = np.insert(np.cumsum(ts), 0, 0)
-    # Add zero to the beginning of the cumsum of ts ** 2
-    s_sq = np.insert(np.cumsum(ts ** 2), 0, 0)
-    seg_sum = s[m:] - s[:-m]
-    seg_sum_sq = s_sq[m:] - s_sq[:-m]
-    return np.sqrt(seg_sum_sq / m - (seg_sum / m) ** 2)
+
+def next_fast_len(target):
+    """
+    Returns the smallest FFT length >= target whose only prime factors are 2, 3 and 5
+    :param target: Minimum length
+    :return: FFT length
+    """
+
+    if target <= 6:
+        return max(int(target), 1)
+
+    best = 1 << (int(target) - 1).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            # Smallest power of two that brings p35 up to the target
+            quotient = -(-target // p35)
+            length = p35 << (int(quotient) - 1).bit_length()
+            if length == target:
+                return length
+
+            best = min(best, length)
+            p35 *= 3
+
+        p5 *= 5
+
+    return best
+
+
+def _rfft(x, n, axis=-1):
+    if _fft_backend is not None:
+        return _fft_backend.rfft(x, n, axis=axis, workers=-1)
+
+    return fft.rfft(x, n, axis=axis)
+
+
+def _irfft(x, n, axis=-1):
+    if _fft_backend is not None:
+        return _fft_backend.irfft(x, n, axis=axis, workers=-1)
+
+    return fft.irfft(x, n, axis=axis)
+
+
+def _sliding_dot_product_fft(query, ts):
+    """
+    Sliding dot product from a single FFT over the whole time series
+    """
+
+    m = len(query)
+    n = len(ts)
+    length = next_fast_len(n)
+
+    # A circular convolution of length >= n only wraps into the first m - 1 values, which aren't true dot products
+    dot_product = _irfft(_rfft(ts, length) * _rfft(query[::-1], length), length)
+    return dot_product[m - 1:n]
+
+
+def _sliding_dot_product_blocked(query, ts, length):
+    """
+    Sliding dot product by overlap-save: the time series is cut into blocks of the FFT length that overlap by
+    m - 1 values, and every block contributes length - m + 1 dot products. Blocks are transformed in groups,
+    so the temporaries are bounded by _FFT_GROUP_ELEMENTS rather than by the length of the time series.
+    """
+
+    m = len(query)
+    n = len(ts)
+    hop = length - m + 1
+    dot_product = np.empty(n - m + 1)
+
+    query_spectrum = _rfft(query[::-1], length)
+
+    # Blocks that lie entirely within the time series, as a strided view (no copy)
+    n_blocks = (n - length) // hop + 1 if n >= length else 0
+    blocks = as_strided(ts, shape=(n_blocks, length), strides=(hop * ts.strides[0], ts.strides[0]))
+
+    group = max(1, _FFT_GROUP_ELEMENTS // length)
+    for start in range(0, n_blocks, group):
+        stop = min(start + group, n_blocks)
+        block_dot = _irfft(_rfft(blocks[start:stop], length, axis=1) * query_spectrum, length, axis=1)
+        dot_product[start * hop:stop * hop] = block_dot[:, m - 1:].ravel()
+
+    # The remaining tail is shorter than two blocks
+    done = n_blocks * hop
+    if done < len(dot_product):
+        dot_product[done:] = _sliding_dot_product_fft(query, ts[done:])
+
+    return dot_product
 
 
 def sliding_dot_product(query, ts):
     """
     Calculate the dot product between the query and all subsequences of length(query)
-    in the timeseries ts. Note that we use Numpy's rfft method instead of fft.
+    in the timeseries ts. Short queries are correlated directly, queries that are short relative to
+    the time series use a blocked overlap-save FFT, and everything else a single FFT over the whole
+    time series. FFTs run on scipy.fft with all cores when scipy is installed, numpy.fft otherwise.
     :param query:
     :param ts:
     :return:
     """
 
+    query = np.asarray(query, dtype=float)
+    ts = np.ascontiguousarray(ts, dtype=float)
     m = len(query)
     n = len(ts)
 
-    # If length is odd, zero-pad time time series
-    ts_add = 0
-    if n % 2 == 1:
-        ts = np.insert(ts, 0, 0)
-        ts_add = 1
+    if m <= _DIRECT_MAX_QUERY:
+        return np.correlate(ts, query, 'valid')
+
+    length = next_fast_len(_BLOCK_FACTOR * m)
+    if n >= 2 * length:
+        return _sliding_dot_product_blocked(query, ts, length)
+
+    return _sliding_dot_product_fft(query, ts)
+
+
+def _stomp_rows(query, target, m, stats, dot, dot_first, start, stop, self_join):
+    """
+    Squared distance profiles of the subsequences start to stop of query against target, computed with the STOMP
+    dot product recurrence. Works on the last axis, so query and target may also be 2-D arrays holding one series
+    per row (with every other argument stacked the same way).
+    :param query: Time series holding the rows, without NaN or inf (see fill_invalid)
+    :param target: Time series holding the columns, without NaN or inf
+    :param m: Query length
+    :param stats: (mean of query, std of query, mean of target, std of target, valid query windows, valid target
+    windows), a validity mask being None when every window is valid
+    :param dot: Sliding dot product of the subsequence start of query against target, updated in place
+    :param dot_first: Dot products of every subsequence of query with the first subsequence of target
+    :param start: First row
+    :param stop: End of the rows
+    :param self_join: Exclude the trivial matches around every row
+    :return: Generator of (row, squared distance profile). Invalid rows and columns are at distance inf.
+    """
+    mean_q, std_q, mean_t, std_t, valid_q, valid_t = stats
+    n = target.shape[-1]
+    length = n - m + 1
+
+    for idx in range(start, stop):
+        if idx > start:
+            dot[..., 1:] = (dot[..., :-1] - query[..., idx - 1, None] * target[..., :length - 1] +
+                            query[..., idx + m - 1, None] * target[..., m:n])
+            dot[..., 0] = dot_first[..., idx]
+
+        distance_profile = 2 * m * (1 - (dot - m * mean_q[..., idx, None] * mean_t) /
+                                    (m * std_q[..., idx, None] * std_t))
 
-    q_add = 0
-    # If length is odd, zero-pad query
-    if m % 2 == 1:
-        query = np.insert(query, 0, 0)
-        q_add = 1
+        if self_join:
+            trivial_match_range = (int(max(0, idx - np.round(m / 2, 0))), int(min(idx + np.round(m / 2 + 1, 0), n)))
+            distance_profile[..., trivial_match_range[0]:trivial_match_range[1]] = np.inf
 
-    # This reverses the array
-    query = query[::-1]
+        if valid_t is not None:
+            distance_profile[~np.broadcast_to(valid_t, distance_profile.shape)] = np.inf
 
-    query = np.pad(query, (0, n - m + ts_add - q_add), 'constant')
+        if valid_q is not None:
+            distance_profile[~valid_q[..., idx]] = np.inf
 
-    # Determine trim length for dot product. Note that zero-padding of the query has no effect on array length,
-    # which is solely determined by the longest vector
-    trim = m - 1 + ts_add
+        yield idx, distance_profile
 
-    dot_product = fft.irfft(fft.rfft(ts) * fft.rfft(query))
 
-    # Note that we only care about the dot product results from index m-1 onwards, as the first few values aren't
-    # true dot products (due to the way the FFT works for dot products)
-    return dot_product[trim:]
+def _n_jobs(n_jobs):
+    """
+    Number of workers for an n_jobs argument: None for 1, -1 (or any negative value) for one per core
+    """
+    if n_jobs is None:
+        return 1
+
+    return multiprocessing.cpu_count() if n_jobs < 0 else max(1, int(n_jobs))
 
 
 def dot_product_stomp(ts, m, dot_first, dot_prev, order):
@@ -142,21 +535,37 @@ def dot_product_stomp(ts, m, dot_first, dot_prev, order):
     return dot
 
 
-def mass(query, ts):
+def mass(query, ts, stats=None):
     """
     Calculates Mueen's ultra-fast Algorithm for Similarity Search (MASS) between a query and timeseries.
     MASS is a Euclidian distance similarity search algorithm. Note that we are returning the square of MASS.
+    Subsequences containing NaN or inf (and every subsequence, if the query contains one) are at distance inf.
     :param query: Query
     :param ts: Timeseries
+    :param stats: Optional RollingStats of ts, queried instead of recomputing the rolling statistics. ts may then
+    already have its non-finite values replaced by zero (see fill_invalid), which avoids a copy per call.
     :return: Square of MASS
     """
 
     m = len(query)
+    if not np.isfinite(query).all():
+        return np.full(len(ts) - m + 1, np.inf)
+
     q_mean = np.mean(query)
     q_std = np.std(query)
-    mean, std = mov_mean_std(ts, m)
+    stats = RollingStats(ts) if stats is None else stats
+    valid = stats.valid(m)
+    if valid is not None:
+        ts = fill_invalid(ts)
+
+    mean, std = stats.mean_std(m)
     dot = sliding_dot_product(query, ts)
-    return 2 * m * (1 - (dot - m * mean * q_mean) / (m * std * q_std))
+    res = 2 * m * (1 - (dot - m * mean * q_mean) / (m * std * q_std))
+
+    if valid is not None:
+        res[~valid] = np.inf
+
+    return res
 
 
 def mass_stomp(query, ts, dot_first, dot_prev, index, mean, std):
@@ -168,8 +577,8 @@ def mass_stomp(query, ts, dot_first, dot_prev, index, mean, std):
     :param dot_first:
     :param dot_prev:
     :param index:
-    :param mean:
-    :param std:
+    :param mean: Moving mean of ts (see RollingStats)
+    :param std: Moving std dev of ts
     :return:
     """
 
@@ -181,11 +590,23 @@ def mass_stomp(query, ts, dot_first, dot_prev, index, mean, std):
     return res, dot
 
 
+def series_hash(ts):
+    """
+    Fast content hash of a time series. Two arrays hash equal when they have the same dtype, shape and values.
+    :param ts: Timeseries
+    :return: Hex digest
+    """
+    ts = np.ascontiguousarray(ts)
+    digest = hashlib.sha1(str(ts.dtype.str).encode("ascii") + str(ts.shape).encode("ascii"))
+    digest.update(ts.view(np.uint8))
+    return digest.hexdigest()
+
+
 def apply_av(mp, av=None):
     """
     Applies annotation vector 'av' to the original matrix profile and matrix profile index contained in tuple mp,
     and returns the corrected MP/MPI as a new tuple
-    :param mp: Matrix profile
+    :param mp: Matrix profile as a (mp, mp_index) tuple or a MatrixProfile
     :param av: Annotation vector
     :return: Corrected matrix profile
     """
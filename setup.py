@@ -14,6 +14,9 @@ setuptools.setup(
     url="https://github.com/target/matrixprofile-ts",
     packages=['matrixprofile'],
     install_requires=['numpy', 'six'],
+    entry_points={
+        'console_scripts': ['matrixprofile=matrixprofile.cli:main'],
+    },
     classifiers=[
         "Programming Language :: Python :: 2",
         "Programming Language :: Python :: 3",
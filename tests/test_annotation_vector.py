@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from matrixprofile.annotation_vector import *
+import numpy as np
+import pytest
+
+
+class TestClass(TestCase):
+    def test_complexity_av(self):
+        ts = np.array([0.0, 0.0, 0.0, 1.0, -1.0, 1.0])
+        # Line lengths are 0, 1, sqrt(5) and sqrt(8)
+        av = complexity_av(ts, 3)
+        assert len(av) == 4
+        assert av[0] == 0.0 and av[-1] == 1.0
+        assert (np.diff(av) >= 0).all()
+
+
+    def test_complexity_av_matches_loop(self):
+        ts = np.random.RandomState(0).randn(50)
+        m = 8
+        ce = np.array([np.sqrt(np.sum(np.diff(ts[i:i + m]) ** 2)) for i in range(len(ts) - m + 1)])
+        outcome = (ce - ce.min()) / (ce.max() - ce.min())
+        assert np.allclose(complexity_av(ts, m), outcome)
+
+
+    def test_meanstd_av(self):
+        ts = np.array([0.0, 0.0, 0.0, 0.0, 1.0, -1.0, 1.0])
+        assert (meanstd_av(ts, 2) == np.array([0., 0., 0., 1., 1., 1.])).all()
+
+
+    def test_clipping_av(self):
+        ts = np.array([5.0, 5.0, 1.0, 2.0, 3.0, 0.0])
+        av = clipping_av(ts, 2)
+        assert av[0] == 0.0
+        assert av[2] == 1.0
+
+
+    def test_motion_artifact_av(self):
+        ts = np.zeros(20)
+        ts[10:] = 100.0
+        ts += np.linspace(0, 1, 20)
+        av = motion_artifact_av(ts, 4, threshold=3.0)
+        assert (av[7:10] == 0).all()
+        assert av[0] == 1 and av[-1] == 1
+
+
+    def test_combine_av(self):
+        outcome = np.array([0.0, 0.5, 1.0])
+        assert np.allclose(combine_av(np.array([0.0, 1.0, 1.0]), np.array([1.0, 0.5, 1.0])), outcome)
+
+
+    def test_combine_av_length_error(self):
+        with pytest.raises(ValueError):
+            combine_av(np.ones(3), np.ones(2))
@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from matrixprofile.approximate import *
+from matrixprofile.matrix_profile import stomp
+import numpy as np
+import pytest
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        t = np.arange(3000)
+        self.ts = np.sin(2 * np.pi * t / 150) + 0.05 * rng.randn(3000)
+        self.ts[1500:1600] += np.linspace(0, 2, 100)
+        self.m = 128
+
+
+    def test_paa(self):
+        assert np.allclose(paa(np.array([1.0, 3.0, 2.0, 4.0, 5.0]), 2), np.array([2.0, 3.0]))
+
+
+    def test_accuracy_range(self):
+        with pytest.raises(ValueError):
+            approx_mp(self.ts, self.m, accuracy=1.5)
+
+
+    def test_factor_one_is_exact(self):
+        mp, mp_index, error = approx_mp(self.ts[:500], 16)
+        outcome = stomp(self.ts[:500], 16)
+        assert np.allclose(mp, outcome[0])
+        assert (error == 0).all()
+
+
+    def test_refined_entries(self):
+        mp, mp_index, error = approx_mp(self.ts, self.m, accuracy=0.1)
+        exact, exact_index = stomp(self.ts, self.m)
+        refined = error == 0
+        assert refined.sum() >= 0.1 * len(mp)
+
+        # Refined entries are exact, and every entry is a real distance, never below the exact value
+        assert np.allclose(mp[refined], exact[refined])
+        assert (mp >= exact - 1e-6).all()
+        assert (mp - error <= exact + 1e-6).all()
+        assert np.array_equal(error[~refined], mp[~refined])
+        assert (np.abs(mp_index - np.arange(len(mp)))[refined] >= self.m // 2).all()
+
+        # The discord is among the refined entries
+        assert refined[np.argmax(exact)] or np.abs(np.flatnonzero(refined) - np.argmax(exact)).min() < self.m
+
+
+    def test_full_accuracy(self):
+        mp, mp_index, error = approx_mp(self.ts, self.m, accuracy=1.0)
+        outcome = stomp(self.ts, self.m)
+        assert (error == 0).all()
+        assert np.allclose(mp, outcome[0])
+        assert np.array_equal(mp_index, outcome[1])
@@ -0,0 +1,108 @@
+from unittest import TestCase
+import sys
+
+import numpy as np
+import pytest
+
+if sys.version_info < (3, 7):
+    pytest.skip("asyncio API requires Python 3.7+", allow_module_level=True)
+
+import asyncio
+from matrixprofile.async_profile import *
+from matrixprofile.matrix_profile import stomp
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        self.runner = ProfileRunner(max_workers=2)
+        self.a = np.sin(np.linspace(0, 20, 200)) + np.linspace(0, 1, 200) ** 2
+
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+
+    def test_stomp_async(self):
+        mp, mp_index = run(stomp_async(self.a, 16, chunk_size=10, runner=self.runner))
+        outcome = stomp(self.a, 16)
+        assert np.allclose(mp, outcome[0])
+        assert (mp_index == outcome[1]).all()
+
+
+    def test_stmp_async_dual(self):
+        b = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0])
+        mp, mp_index = run(stmp_async(b, 4, b, runner=self.runner))
+        assert (mp_index == np.array([0., 1., 2., 3., 0., 1., 2., 3., 0.])).all()
+
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            run(self.runner.run(self.a, 16, engine='scrimp'))
+
+
+    def test_progress_stream(self):
+        snapshots = []
+        run(self.runner.run(self.a, 16, chunk_size=50, callback=snapshots.append))
+        assert [s.rows_done for s in snapshots] == [50, 100, 150, 185]
+        assert all(s.rows_total == 185 for s in snapshots)
+
+        # Snapshots are copies and are not changed by later chunks
+        assert (snapshots[0].mp > snapshots[-1].mp).any()
+        assert np.allclose(snapshots[-1].mp, stomp(self.a, 16)[0])
+
+
+    def test_cancel_between_chunks(self):
+        async def cancel_after_first_chunk():
+            snapshots = []
+            task = asyncio.ensure_future(self.runner.run(self.a, 16, chunk_size=1, callback=snapshots.append))
+            while not snapshots:
+                await asyncio.sleep(0.001)
+
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            return snapshots
+
+        snapshots = run(cancel_after_first_chunk())
+        assert snapshots[-1].rows_done < 185
+
+
+    def test_max_jobs(self):
+        runner = ProfileRunner(max_workers=2, max_jobs=1)
+        running = []
+
+        def record(progress):
+            running.append(runner._job_slots()._value)
+
+        async def two_jobs():
+            return await asyncio.gather(runner.run(self.a, 16, chunk_size=20, callback=record),
+                                        runner.run(self.a, 16, chunk_size=20, callback=record))
+
+        results = run(two_jobs())
+        runner.shutdown()
+        assert all(value == 0 for value in running)
+        assert np.allclose(results[0][0], results[1][0])
+
+
+    def test_max_jobs_several_loops(self):
+        runner = ProfileRunner(max_workers=2, max_jobs=1)
+
+        async def two_jobs():
+            return await asyncio.gather(runner.run(self.a, 16, chunk_size=20),
+                                        runner.run(self.a, 16, chunk_size=20))
+
+        try:
+            for _ in range(2):
+                results = run(two_jobs())
+                assert np.allclose(results[0][0], results[1][0])
+        finally:
+            runner.shutdown()
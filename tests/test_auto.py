@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+from matrixprofile.auto import *
+from matrixprofile.matrix_profile import stmp, stomp_parallel
+import numpy as np
+import pytest
+
+
+class TestClass(TestCase):
+    def test_plan_exact(self):
+        p = plan(10000, 100)
+        assert p.exact
+        assert p.engine == 'stomp_parallel'
+
+
+    def test_plan_short_series(self):
+        assert plan(20, 4, memory_limit=2 ** 30).exact
+
+
+    def test_plan_time_budget_self_join(self):
+        p = plan(10 ** 5, 256, time_budget=3.0, memory_limit=2 ** 34)
+        assert p.engine == 'approx_mp'
+        assert not p.exact
+        assert p.seconds <= 3.0
+
+
+    def test_plan_large_self_join(self):
+        # Below a quarter of the rows a self-join is approximated rather than sampled, refining what the budget allows
+        p = plan(10 ** 6, 100, time_budget=60.0, memory_limit=2 ** 34)
+        assert p.engine == 'approx_mp'
+        assert p.seconds <= 60.0
+        assert 0 < p.options['accuracy'] < 0.05
+
+        # Over budget whatever the accuracy: still approx_mp, at its cheapest
+        p = plan(10 ** 7, 1000, time_budget=1.0, memory_limit=2 ** 34)
+        assert p.engine == 'approx_mp' and p.options['accuracy'] == 0
+
+        # Without any approx_mp plan, sampling is the last resort
+        assert plan(10 ** 6, 3, time_budget=1.0, memory_limit=2 ** 34).engine == 'stamp'
+
+
+    def test_plan_time_budget_ab_join(self):
+        p = plan(10 ** 5, 100, 10 ** 5, time_budget=1.0, memory_limit=2 ** 34)
+        assert p.engine == 'stamp'
+        assert 0 < p.options['sampling'] < 1
+
+
+    def test_plan_memory_limit(self):
+        with pytest.raises(MemoryError):
+            plan(10 ** 5, 100, memory_limit=1000)
+
+        # approx_mp cannot stand in for an AB-join
+        with pytest.raises(MemoryError):
+            plan(20000, 64, 19000, memory_limit=1.6e6)
+
+
+    def test_plan_errors(self):
+        with pytest.raises(ValueError):
+            plan(10, 20)
+
+
+    def test_describe(self):
+        assert describe(plan(10000, 100, n_jobs=1)) == 'stomp_parallel(n_jobs=1)'
+
+
+    def test_matrix_profile(self):
+        a = np.sin(np.linspace(0, 40, 400)) + 0.1 * np.cos(np.linspace(0, 210, 400))
+        outcome = stmp(a, 20)
+
+        r = matrix_profile(a, 20)
+        assert r.join == 'self'
+        assert r.algorithm.startswith('stomp_parallel')
+        assert np.allclose(r.mp, outcome[0])
+
+
+    def test_matrix_profile_ab_join(self):
+        a = np.sin(np.linspace(0, 40, 400))
+        b = np.cos(np.linspace(0, 17, 150)) + 0.1 * np.sin(np.linspace(0, 190, 150))
+
+        r = matrix_profile(a, 20, b, n_jobs=1)
+        assert r.join == 'ab'
+        assert np.allclose(r.mp, stmp(a, 20, b)[0])
+
+
+    def test_stomp_parallel(self):
+        a = np.sin(np.linspace(0, 40, 400)) + 0.1 * np.cos(np.linspace(0, 210, 400))
+        a[150] = np.nan
+        outcome = stmp(a, 20)
+
+        for n_jobs in [1, 3]:
+            mp, mp_index = stomp_parallel(a, 20, n_jobs=n_jobs)
+            assert np.allclose(mp, outcome[0])
+            assert np.array_equal(mp_index, outcome[1])
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from matrixprofile.batch import *
+from matrixprofile.matrix_profile import stomp
+from matrixprofile.utils import mov_mean_std, sliding_dot_product
+import numpy as np
+import pytest
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        self.series = np.random.RandomState(0).randn(5, 100).cumsum(axis=1)
+
+
+    def test_batch_mov_mean_std(self):
+        mean, std = batch_mov_mean_std(self.series, 8)
+        for row, ts in enumerate(self.series):
+            outcome = mov_mean_std(ts, 8)
+            assert np.allclose(mean[row], outcome[0])
+            assert np.allclose(std[row], outcome[1])
+
+
+    def test_batch_sliding_dot_product(self):
+        dot = batch_sliding_dot_product(self.series[:, 3:11], self.series)
+        for row, ts in enumerate(self.series):
+            assert np.allclose(dot[row], sliding_dot_product(ts[3:11], ts))
+
+
+    def test_stomp_batch(self):
+        mp, mp_index = stomp_batch(self.series, 8)
+        assert mp.shape == (5, 93)
+        for row, ts in enumerate(self.series):
+            outcome = stomp(ts, 8)
+            assert np.allclose(mp[row], outcome[0])
+            assert (mp_index[row] == outcome[1]).all()
+
+
+    def test_stomp_batch_ragged(self):
+        series = [self.series[0], self.series[1, :60], self.series[2]]
+        mps, mp_indices = stomp_batch(series, 8)
+        for ts, mp, mp_index in zip(series, mps, mp_indices):
+            outcome = stomp(ts, 8)
+            assert np.allclose(mp, outcome[0])
+            assert (mp_index == outcome[1]).all()
+
+
+    def test_stomp_batch_invalid(self):
+        series = np.copy(self.series)
+        series[1, 40] = np.nan
+        series[3, 0] = np.inf
+        mp, mp_index = stomp_batch(series, 10)
+        for ts, profile, index in zip(series, mp, mp_index):
+            outcome = stomp(ts, 10)
+            assert np.allclose(profile, outcome[0])
+            assert np.array_equal(index, outcome[1])
+
+
+    def test_stomp_batch_too_short(self):
+        with pytest.raises(ValueError):
+            stomp_batch(self.series[:, :5], 8)
@@ -0,0 +1,90 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from matrixprofile.cache import *
+from matrixprofile.matrix_profile import stomp, stmp
+import numpy as np
+import pytest
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.a = np.sin(np.linspace(0, 30, 300)) + 0.1 * np.cos(np.linspace(0, 170, 300))
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def test_hit_and_miss(self):
+        cache = ProfileCache()
+        first = cache.compute('stomp', self.a, 20)
+        second = cache.compute('stomp', self.a.copy(), 20)
+        assert cache.stats['misses'] == 1
+        assert cache.stats['hits'] == 1
+        assert np.allclose(first.mp, second.mp)
+        assert cache.stats['bytes'] == first.mp.nbytes + first.mp_index.nbytes
+
+
+    def test_returns_copies(self):
+        cache = ProfileCache()
+        cache.compute('stomp', self.a, 20).mp[:] = -1
+        assert (cache.compute('stomp', self.a, 20).mp >= 0).all()
+
+
+    def test_key_depends_on_inputs(self):
+        keys = set([ProfileCache.key('stomp', self.a, 20), ProfileCache.key('stomp', self.a, 21),
+                    ProfileCache.key('stmp', self.a, 20), ProfileCache.key('stomp', self.a, 20, self.a),
+                    ProfileCache.key('stamp', self.a, 20, sampling=0.5), ProfileCache.key('stamp', self.a, 20)])
+        assert len(keys) == 6
+
+
+    def test_wrap(self):
+        cached_stmp = ProfileCache().wrap('stmp')
+        mp, mp_index = cached_stmp(self.a, 20)
+        outcome = stmp(self.a, 20)
+        assert np.allclose(mp, outcome[0])
+        assert (mp_index == outcome[1]).all()
+
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            ProfileCache().compute('scrimp', self.a, 20)
+
+
+    def test_eviction(self):
+        cache = ProfileCache(max_bytes=2 * 281 * 8 * 2)
+        for m in (20, 21, 22):
+            cache.compute('stomp', self.a, m)
+
+        assert cache.stats['evictions'] == 1
+        assert cache.stats['entries'] == 2
+        assert cache.stats['bytes'] <= cache.max_bytes
+
+
+    def test_disk_tier(self):
+        ProfileCache(directory=self.dir).compute('stomp', self.a, 20)
+        cache = ProfileCache(directory=self.dir)
+        cache.compute('stomp', self.a, 20)
+        assert cache.stats['disk_hits'] == 1
+        assert cache.stats['misses'] == 0
+
+
+    def test_disk_budget(self):
+        cache = ProfileCache(directory=self.dir, max_disk_bytes=1)
+        cache.compute('stomp', self.a, 20)
+        assert os.listdir(self.dir) == []
+
+
+    def test_prefix_extension(self):
+        cache = ProfileCache()
+        cache.compute('stomp', self.a[:250], 20)
+        extended = cache.compute('stomp', self.a, 20)
+        outcome = stomp(self.a, 20)
+        assert cache.stats['prefix_hits'] == 1
+        assert cache.stats['misses'] == 1
+        assert np.allclose(extended.mp, outcome[0])
+        assert (extended.mp_index == outcome[1]).all()
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from matrixprofile.chains import *
+from matrixprofile.matrix_profile import stomp
+import numpy as np
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        # Chains 0 -> 2 -> 5 -> 7 and 1 -> 4; 3 -> 6 is one-directional (left_index[6] != 3)
+        inf = np.inf
+        self.right_index = np.array([2., 4., 5., 6., inf, 7., inf, inf])
+        self.left_index = np.array([inf, inf, 0., 1., 1., 2., 4., 5.])
+
+
+    def test_chain_links(self):
+        outcome = np.array([2, 4, 5, -1, -1, 7, -1, -1])
+        assert (chain_links(self.left_index, self.right_index) == outcome).all()
+
+
+    def test_all_chains(self):
+        chains = all_chains(self.left_index, self.right_index)
+        assert len(chains) == 2
+        assert (chains[0] == np.array([0, 2, 5, 7])).all()
+        assert (chains[1] == np.array([1, 4])).all()
+        assert len(all_chains(self.left_index, self.right_index, min_length=1)) == 4
+
+
+    def test_longest_chain(self):
+        assert (longest_chain(self.left_index, self.right_index) == np.array([0, 2, 5, 7])).all()
+        assert len(longest_chain(np.array([]), np.array([]))) == 0
+
+
+    def test_longest_chain_matches_walk(self):
+        t = np.arange(600)
+        ts = np.sin(2 * np.pi * t / 50) * (1 + t / 600.0) + 0.01 * np.random.RandomState(0).randn(600)
+        _, _, _, left_index, _, right_index = stomp(ts, 25, left_right=True)
+
+        best = []
+        for start in range(len(ts) - 24):
+            chain = [start]
+            while np.isfinite(right_index[chain[-1]]) and left_index[int(right_index[chain[-1]])] == chain[-1]:
+                chain.append(int(right_index[chain[-1]]))
+
+            if len(chain) > len(best):
+                best = chain
+
+        assert (longest_chain(left_index, right_index) == np.array(best)).all()
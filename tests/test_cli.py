@@ -0,0 +1,74 @@
+from unittest import TestCase
+import json
+import os
+import shutil
+import tempfile
+
+from matrixprofile.cli import *
+from matrixprofile.matrix_profile import stomp
+import numpy as np
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        t = np.arange(400)
+        self.ts = np.sin(2 * np.pi * t / 40) + 0.01 * np.cos(t)
+        self.ts[200:210] += 2.0
+        np.save(os.path.join(self.dir, 'a.npy'), self.ts)
+        np.savetxt(os.path.join(self.dir, 'b.csv'), np.column_stack((np.arange(400), self.ts)), delimiter=',')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def test_read_series(self):
+        assert np.allclose(read_series(os.path.join(self.dir, 'a.npy')), self.ts)
+        assert np.allclose(read_series(os.path.join(self.dir, 'b.csv'), column=1), self.ts)
+        assert read_series(os.path.join(self.dir, 'a.npy'), 'float32').dtype == np.float32
+
+
+    def test_main_writes_outputs(self):
+        assert main([os.path.join(self.dir, 'a.npy'), '-m', '20', '--discords', '1']) == 0
+
+        result = MatrixProfile.load(os.path.join(self.dir, 'a.npy' + PROFILE_SUFFIX))
+        assert np.allclose(result.mp, stomp(self.ts, 20)[0])
+        assert result.algorithm == 'stomp'
+
+        with open(os.path.join(self.dir, 'a.npy' + SUMMARY_SUFFIX)) as f:
+            summary = json.load(f)
+
+        assert abs(summary['discords'][0] - 200) < 20
+        assert len(summary['motifs']) == 3
+
+
+    def test_main_skips_up_to_date(self):
+        pattern = os.path.join(self.dir, '*.npy')
+        main([pattern, '-m', '20'])
+        profile = os.path.join(self.dir, 'a.npy' + PROFILE_SUFFIX)
+        modified = os.path.getmtime(profile)
+        os.utime(profile, (modified - 100, modified - 100))
+        os.utime(os.path.join(self.dir, 'a.npy'), (modified - 200, modified - 200))
+
+        main([pattern, '-m', '20'])
+        assert os.path.getmtime(profile) == modified - 100
+
+        # Changing the options makes the outputs stale
+        main([pattern, '-m', '21'])
+        assert MatrixProfile.load(profile).m == 21
+
+
+    def test_main_parallel_compact(self):
+        pattern = os.path.join(self.dir, '*')
+        assert main([pattern, '-m', '20', '--column', '1', '--dtype', 'float32', '-j', '2']) == 0
+        for name in ('a.npy', 'b.csv'):
+            result = MatrixProfile.load(os.path.join(self.dir, name + PROFILE_SUFFIX))
+            assert result.mp.dtype == np.float32
+
+
+    def test_main_reports_failures(self):
+        with open(os.path.join(self.dir, 'c.csv'), 'w') as f:
+            f.write('not,a,number\n')
+
+        assert main([os.path.join(self.dir, 'c.csv'), '-m', '20']) == 1
@@ -0,0 +1,64 @@
+from unittest import TestCase
+
+from matrixprofile.consensus import *
+from matrixprofile.matrix_profile import stmp
+import numpy as np
+import pytest
+
+
+def brute_force(series, m):
+    # stmp(other, m, ts) holds the nearest neighbour distance in other of every subsequence of ts
+    radii = [np.max([stmp(other, m, ts)[0] for l, other in enumerate(series) if l != j], axis=0)
+             for j, ts in enumerate(series)]
+    radius = min(np.min(r) for r in radii)
+
+    # Radii that only differ by rounding are ties, resolved by the lowest series and subsequence
+    for j, r in enumerate(radii):
+        close = np.flatnonzero(np.isclose(r, radius))
+        if len(close):
+            return radius, j, close[0]
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        motif = 4 * np.sin(np.linspace(0, 2 * np.pi, 20))
+        self.series = []
+        for n in [80, 95, 70, 90]:
+            ts = rng.randn(n)
+            start = rng.randint(0, n - 20)
+            ts[start:start + 20] += motif
+            self.series.append(ts)
+
+
+    def test_consensus_motif(self):
+        outcome = brute_force(self.series, 20)
+        radius, j, i = consensus_motif(self.series, 20)
+        assert np.isclose(radius, outcome[0])
+        assert (j, i) == outcome[1:]
+
+
+    def test_consensus_motif_two_series(self):
+        outcome = brute_force(self.series[:2], 20)
+        radius, j, i = consensus_motif(self.series[:2], 20)
+        assert np.isclose(radius, outcome[0])
+        assert (j, i) == outcome[1:]
+
+
+    def test_consensus_motif_parallel(self):
+        assert consensus_motif(self.series, 20, n_jobs=3) == consensus_motif(self.series, 20)
+
+
+    def test_consensus_motif_invalid(self):
+        series = [np.copy(ts) for ts in self.series]
+        series[0][10] = np.nan
+        series[2][60] = np.inf
+        outcome = brute_force(series, 20)
+        radius, j, i = consensus_motif(series, 20)
+        assert np.isclose(radius, outcome[0])
+        assert (j, i) == outcome[1:]
+
+
+    def test_consensus_motif_errors(self):
+        with pytest.raises(ValueError):
+            consensus_motif(self.series[:1], 20)
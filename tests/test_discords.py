@@ -2,6 +2,7 @@ from unittest import TestCase
 
 from matrixprofile.discords import *
 import numpy as np
+import pytest
 
 
 class TestClass(TestCase):
@@ -33,3 +34,15 @@ class TestClass(TestCase):
         mp = np.array([1.0, 2.0, 3.0, 4.0])
         outcome = np.array([3, 1, sys.maxsize, sys.maxsize])
         assert (np.allclose(discords(mp, 1, 10), outcome))
+
+
+    def test_discords_av(self):
+        mp = np.array([1.0, 2.0, 3.0, 4.0])
+        av = np.array([1.0, 1.0, 1.0, 0.0])
+        outcome = np.array([2, 0])
+        assert (np.allclose(discords(mp, 1, 2, av), outcome))
+
+
+    def test_discords_av_length_error(self):
+        with pytest.raises(ValueError):
+            discords(np.array([1.0, 2.0, 3.0, 4.0]), 0, 2, np.array([1.0]))
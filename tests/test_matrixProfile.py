@@ -1,7 +1,10 @@
 from unittest import TestCase
 
 from matrixprofile.matrix_profile import *
+from matrixprofile import utils
+from matrixprofile.utils import RollingStats, z_normalize_euclidian
 import numpy as np
+import pytest
 
 
 class TestClass(TestCase):
@@ -124,3 +127,154 @@ class TestClass(TestCase):
         mpi_outcome = np.array([4., 5., 6., 7., 0., 1., 2., 3., 0.])
         r = stomp(a, 4)
         assert (r[1] == mpi_outcome).all()
+
+
+    def test_stomp_k_nearest(self):
+        a = np.sin(np.linspace(0, 20, 120)) + np.linspace(0, 2, 120) ** 2
+        mp, mp_index = stomp(a, 10, k=3)
+        outcome = stomp(a, 10)
+        assert mp.shape == (111, 3)
+        assert np.allclose(mp[:, 0], outcome[0])
+        assert (mp_index[:, 0] == outcome[1]).all()
+        assert (np.diff(mp, axis=1) >= 0).all()
+
+        # Every neighbour is outside of the exclusion zone and matches a brute force search
+        for i in (0, 50, 110):
+            profile = np.array([z_normalize_euclidian(a[i:i + 10], a[j:j + 10]) if abs(i - j) > 5 else np.inf
+                                for j in range(111)])
+            assert np.allclose(mp[i], np.sort(profile)[:3])
+            assert (np.abs(mp_index[i] - i) > 5).all()
+
+
+    def test_stmp_k_nearest(self):
+        a = np.sin(np.linspace(0, 20, 120)) + np.linspace(0, 2, 120) ** 2
+        mp, mp_index = stmp(a, 10, k=2)
+        outcome = stomp(a, 10, k=2)
+        assert np.allclose(mp, outcome[0])
+        assert (mp_index == outcome[1]).all()
+
+
+    def test_k_nearest_error(self):
+        a = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0])
+        with pytest.raises(ValueError):
+            stomp(a, 4, k=0)
+
+
+    def test_engines_skip_invalid_windows(self):
+        a = np.sin(np.linspace(0, 20, 120)) + np.linspace(0, 2, 120) ** 2
+        a[50:53] = np.nan
+        a[90] = np.inf
+        m = 10
+
+        valid = np.array([np.isfinite(a[i:i + m]).all() for i in range(111)])
+        outcome = np.full(111, np.inf)
+        for j in np.flatnonzero(valid):
+            outcome[j] = min(z_normalize_euclidian(a[i:i + m], a[j:j + m]) for i in np.flatnonzero(valid)
+                             if abs(i - j) > 5)
+
+        for engine in (naive_mp, stmp, stomp, lambda ts, m: stamp(ts, m, sampling=1.0)):
+            mp, mp_index = engine(a, m)
+            assert np.allclose(mp, outcome)
+            assert valid[mp_index[valid].astype(int)].all()
+            assert np.isinf(mp_index[~valid]).all()
+
+
+    def test_stmp_fills_invalid_once(self):
+        a = np.sin(np.linspace(0, 20, 120))
+        a[50] = np.nan
+        fill_invalid = utils.fill_invalid
+        copies = []
+
+        def counting(ts):
+            filled = fill_invalid(ts)
+            if filled is not ts:
+                copies.append(len(ts))
+            return filled
+
+        utils.fill_invalid = counting
+        try:
+            outcome = stmp(a, 10)
+        finally:
+            utils.fill_invalid = fill_invalid
+
+        assert copies == []
+        assert np.allclose(outcome[0], stomp(a, 10)[0])
+
+
+    def test_stampi_invalid_value(self):
+        a = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0])
+        r = stomp(a, 4)
+        mp, mp_index = stampi_update(a, 4, r[0], r[1], np.nan)
+        assert np.isinf(mp[-1]) and np.isinf(mp_index[-1])
+        assert np.allclose(mp[:-1], r[0])
+
+
+    def test_stampi_stats(self):
+        a = np.random.RandomState(0).randn(100)
+        r = stomp(a[:80], 8)
+        mp, mp_index = r
+        stats = RollingStats(a[:80])
+        for n in range(80, 100):
+            outcome = stampi_update(a[:n], 8, mp, mp_index, a[n])
+            mp, mp_index = stampi_update(a[:n], 8, mp, mp_index, a[n], stats=stats)
+            assert np.allclose(mp, outcome[0])
+            assert np.allclose(mp_index, outcome[1])
+
+        assert len(stats) == 100
+        with pytest.raises(ValueError):
+            stampi_update(a, 8, mp, mp_index, 1.0, stats=RollingStats(a[:10]))
+
+
+    def test_left_right_profiles(self):
+        a = np.sin(np.linspace(0, 20, 120)) + np.linspace(0, 2, 120) ** 2
+        m = 10
+        distances = np.array([[z_normalize_euclidian(a[i:i + m], a[j:j + m]) if abs(i - j) > 5 else np.inf
+                               for j in range(111)] for i in range(111)])
+        left = np.tril(distances, -1) + np.triu(np.full((111, 111), np.inf))
+        right = np.triu(distances, 1) + np.tril(np.full((111, 111), np.inf))
+
+        for engine in (naive_mp, stmp, stomp):
+            mp, mp_index, left_mp, left_index, right_mp, right_index = engine(a, m, left_right=True)
+            assert np.allclose(mp, engine(a, m)[0])
+            assert np.allclose(left_mp, left.min(axis=1))
+            assert np.allclose(right_mp, right.min(axis=1))
+            assert np.allclose(distances[np.arange(6, 111), left_index[6:].astype(int)], left_mp[6:])
+            assert (left_index[6:] < np.arange(6, 111)).all() and np.isinf(left_index[:6]).all()
+            assert (right_index[:-6] > np.arange(105)).all() and np.isinf(right_index[-6:]).all()
+
+
+    def test_left_right_requires_self_join(self):
+        a = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0])
+        with pytest.raises(ValueError):
+            stomp(a, 4, a, left_right=True)
+
+
+    def test_extend_profile(self):
+        a = np.sin(np.linspace(0, 30, 300)) + 0.1 * np.cos(np.linspace(0, 170, 300))
+        r = stomp(a[:200], 16)
+        mp, mp_index = extend_profile(a[:200], r[0], r[1], a[200:], 16)
+        outcome = stomp(a, 16)
+        assert np.allclose(mp, outcome[0])
+        assert (mp_index == outcome[1]).all()
+
+
+    def test_extend_profile_matches_stampi(self):
+        a = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0])
+        r = stomp(a, 4)
+        mp, mp_index = extend_profile(a, r[0], r[1], [95], 4)
+        outcome = stampi_update(a, 4, r[0], r[1], 95)
+        assert np.allclose(mp, outcome[0])
+        assert np.allclose(mp_index, outcome[1])
+
+
+    def test_extend_profile_length_error(self):
+        a = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0])
+        with pytest.raises(ValueError):
+            extend_profile(a, np.zeros(3), np.zeros(3), [1.0], 4)
+
+
+    def test_extend_profile_k_nearest_error(self):
+        a = np.random.RandomState(0).randn(60)
+        mp, mp_index = stomp(a, 8, k=2)
+        with pytest.raises(ValueError, match='k-nearest-neighbour'):
+            extend_profile(a, mp, mp_index, [1.0], 8)
@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from matrixprofile.motifs import *
+import numpy as np
+import pytest
+
+
+class TestClass(TestCase):
+    def test_motifs_exclude_one(self):
+        mp = np.array([4.0, 3.0, 2.0, 1.0])
+        outcome = np.array([3, 1, sys.maxsize, sys.maxsize])
+        assert (np.allclose(motifs(mp, 1, 4), outcome))
+
+
+    def test_motifs_skip_inf(self):
+        mp = np.array([np.inf, 3.0, np.inf, 1.0])
+        outcome = np.array([3, 1, sys.maxsize])
+        assert (np.allclose(motifs(mp, 1, 3), outcome))
+
+
+    def test_motifs_empty_mp(self):
+        assert len(motifs(np.array([]), 1, 4)) == 0
+
+
+    def test_motifs_av(self):
+        mp = np.array([4.0, 3.0, 2.0, 1.0])
+        av = np.array([1.0, 1.0, 1.0, 0.0])
+        assert (np.allclose(motifs(mp, 1, 1, av), np.array([2])))
+
+
+    def test_motifs_av_length_error(self):
+        with pytest.raises(ValueError):
+            motifs(np.array([1.0, 2.0]), 0, 1, np.array([1.0]))
@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from matrixprofile.mpdist import *
+from matrixprofile.mpdist import _SeriesStats, _ab_join
+from matrixprofile.utils import next_fast_len
+from matrixprofile.matrix_profile import stmp
+import numpy as np
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        t = np.arange(300)
+        self.sine = np.sin(2 * np.pi * t / 30) + 0.05 * rng.randn(300)
+        self.sine_shifted = np.sin(2 * np.pi * (t + 7) / 30) + 0.05 * rng.randn(300)
+        self.walk = rng.randn(250).cumsum()
+
+
+    def test_ab_join_matches_stmp(self):
+        fft_length = next_fast_len(300)
+        stats_a = _SeriesStats(self.sine, 20, fft_length)
+        stats_b = _SeriesStats(self.walk, 20, fft_length)
+        mp_ab, mp_ba = _ab_join(stats_a, stats_b, 20, fft_length)
+
+        # stmp(ts_a, m, ts_b) profiles the subsequences of ts_b against ts_a
+        assert np.allclose(mp_ba, stmp(self.sine, 20, self.walk)[0])
+        assert np.allclose(mp_ab, stmp(self.walk, 20, self.sine)[0])
+
+
+    def test_ab_join_invalid(self):
+        sine = np.copy(self.sine)
+        sine[100] = np.nan
+        fft_length = next_fast_len(300)
+        mp_ab, mp_ba = _ab_join(_SeriesStats(sine, 20, fft_length), _SeriesStats(self.walk, 20, fft_length), 20,
+                                fft_length)
+
+        assert np.allclose(mp_ba, stmp(sine, 20, self.walk)[0])
+        assert np.allclose(mp_ab, stmp(self.walk, 20, sine)[0])
+        assert np.isfinite(mpdist(sine, self.sine_shifted, 20))
+
+
+    def test_mpdist(self):
+        assert mpdist(self.sine, self.sine, 20) < 1e-6
+        assert mpdist(self.sine, self.sine_shifted, 20) < mpdist(self.sine, self.walk, 20)
+        assert np.isclose(mpdist(self.sine, self.walk, 20), mpdist(self.walk, self.sine, 20))
+
+
+    def test_pairwise_mpdist(self):
+        series = [self.sine, self.walk, self.sine_shifted]
+        outcome = np.array([mpdist(self.sine, self.walk, 20), mpdist(self.sine, self.sine_shifted, 20),
+                            mpdist(self.walk, self.sine_shifted, 20)])
+        assert np.allclose(pairwise_mpdist(series, 20), outcome)
+        assert np.allclose(pairwise_mpdist(series, 20, n_jobs=2), outcome)
+
+
+    def test_pairwise_mpdist_single(self):
+        assert len(pairwise_mpdist([self.sine], 20)) == 0
@@ -0,0 +1,99 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from matrixprofile.result import *
+from matrixprofile.matrix_profile import stomp
+from matrixprofile.discords import discords
+from matrixprofile.segmentation import fluss, Floss
+from matrixprofile.utils import apply_av
+import numpy as np
+import pytest
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.a = np.array([0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0])
+        self.result = MatrixProfile.from_engine(stomp(self.a, 4), self.a, 4, algorithm='stomp')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def test_unpacks_like_tuple(self):
+        mp, mp_index = self.result
+        assert (mp_index == np.array([4., 5., 6., 7., 0., 1., 2., 3., 0.])).all()
+        assert self.result[0] is mp
+        assert len(self.result) == 2
+
+
+    def test_metadata(self):
+        assert self.result.m == 4
+        assert self.result.join == 'self'
+        assert self.result.algorithm == 'stomp'
+        assert len(self.result.input_hash) == 40
+
+        ab = MatrixProfile.from_engine(stomp(self.a, 4, self.a), self.a, 4, self.a)
+        assert ab.join == 'ab'
+
+
+    def test_no_instance_dict(self):
+        with pytest.raises(AttributeError):
+            self.result.extra = 1
+
+
+    def test_save_load_roundtrip(self):
+        path = os.path.join(self.dir, 'profile.mpb')
+        self.result.save(path)
+
+        for mmap in (True, False):
+            loaded = MatrixProfile.load(path, mmap=mmap)
+            assert np.array_equal(loaded.mp, self.result.mp)
+            assert np.array_equal(loaded.mp_index, self.result.mp_index)
+            assert loaded.metadata == self.result.metadata
+
+        assert isinstance(MatrixProfile.load(path).mp, np.memmap)
+
+
+    def test_save_compact(self):
+        path = os.path.join(self.dir, 'profile.mpb')
+        result = MatrixProfile(np.array([1.5, 2.5, np.inf]), np.array([2., 0., np.inf]), 2)
+        result.save(path, compact=True)
+
+        loaded = MatrixProfile.load(path)
+        assert loaded.mp.dtype == np.float32
+        assert isinstance(loaded.mp_index, np.memmap) and loaded.mp_index.dtype == np.int32
+        assert np.array_equal(loaded.mp_index, np.array([2, 0, -1]))
+        assert np.array_equal(to_float_index(loaded.mp_index), np.array([2., 0., np.inf]))
+        assert np.array_equal(MatrixProfile.load(path, float_index=True).mp_index, np.array([2., 0., np.inf]))
+
+
+    def test_compact_consumers(self):
+        ts = np.sin(np.linspace(0, 20, 200))
+        ts[100] = np.nan
+        path = os.path.join(self.dir, 'profile.mpb')
+        MatrixProfile.from_engine(stomp(ts, 16), ts, 16).save(path, compact=True)
+
+        loaded = MatrixProfile.load(path)
+        assert loaded.mp_index[95] == -1 and np.isinf(loaded.mp[95])
+        cac, _ = fluss(loaded.mp_index, 16, 2, excl_factor=1)
+        assert np.array_equal(cac, fluss(to_float_index(loaded.mp_index), 16, 2, excl_factor=1)[0])
+        assert np.array_equal(Floss(ts, 16, *loaded, excl_factor=1).cac, cac)
+
+
+    def test_load_bad_magic(self):
+        path = os.path.join(self.dir, 'profile.mpb')
+        with open(path, 'wb') as f:
+            f.write(b'not a profile')
+
+        with pytest.raises(ValueError):
+            MatrixProfile.load(path)
+
+
+    def test_consumers(self):
+        av = np.ones(len(self.result.mp))
+        assert np.allclose(apply_av(self.result, av), self.result.mp)
+        assert np.allclose(discords(self.result, 1, 2), discords(self.result.mp, 1, 2))
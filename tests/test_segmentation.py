@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from matrixprofile.segmentation import *
+from matrixprofile import utils
+from matrixprofile.matrix_profile import stomp, stampi_update
+import numpy as np
+
+
+class TestClass(TestCase):
+    def setUp(self):
+        # Two regimes: a sine wave followed by a square wave
+        t = np.arange(400)
+        self.ts = np.concatenate([np.sin(2 * np.pi * t[:200] / 20), np.sign(np.sin(2 * np.pi * t[200:] / 20)) + 0.01 * np.cos(t[200:])])
+        self.m = 20
+
+
+    def test_arc_curve(self):
+        mp_index = np.array([2., 3., 0., 1., np.inf])
+        outcome = np.array([2, 4, 2, 0, 0])
+        assert (arc_curve(mp_index) == outcome).all()
+
+
+    def test_arc_curve_matches_loop(self):
+        mp_index = np.array([5., 3., 7., 0., 1., 2., 2., 4.])
+        outcome = np.zeros(len(mp_index))
+        for i, j in enumerate(mp_index.astype(int)):
+            outcome[min(i, j):max(i, j)] += 1
+
+        assert (arc_curve(mp_index) == outcome).all()
+
+
+    def test_corrected_arc_curve_edges(self):
+        mp_index = np.array([2., 3., 0., 1., 6., 7., 4., 5.])
+        cac = corrected_arc_curve(mp_index, 1, excl_factor=1)
+        assert cac[0] == 1.0 and cac[-1] == 1.0
+        assert cac[3] == 0.0
+        assert (cac <= 1.0).all()
+
+
+    def test_regimes_exclusion(self):
+        cac = np.array([1.0, 0.5, 0.1, 0.2, 0.9, 0.3, 1.0])
+        assert (regimes(cac, 3, 2) == np.array([2, 5])).all()
+        assert (regimes(cac, 10, 10) == np.array([2])).all()
+
+
+    def test_fluss(self):
+        mp, mp_index = stomp(self.ts, self.m)
+        cac, boundaries = fluss(mp_index, self.m, 2, excl_factor=1)
+        assert len(cac) == len(mp_index)
+        assert abs(boundaries[0] - 200) < self.m
+
+
+    def test_floss_matches_batch(self):
+        mp, mp_index = stomp(self.ts[:300], self.m)
+        floss = Floss(self.ts[:300], self.m, mp, mp_index, excl_factor=1)
+        for value in self.ts[300:320]:
+            cac = floss.update(value)
+
+        assert np.allclose(cac, corrected_arc_curve(floss.mp_index, self.m, excl_factor=1))
+        assert len(cac) == 320 - self.m + 1
+
+
+    def test_floss_keeps_stats(self):
+        mp, mp_index = stomp(self.ts[:300], self.m)
+        floss = Floss(self.ts[:300], self.m, mp, mp_index)
+        outcome = mp, mp_index
+        rolling_stats = utils.RollingStats
+        built = []
+
+        def counting(*args):
+            built.append(args)
+            return rolling_stats(*args)
+
+        utils.RollingStats = counting
+        try:
+            for n in range(300, 320):
+                floss.update(self.ts[n])
+                outcome = stampi_update(self.ts[:n], self.m, outcome[0], outcome[1], self.ts[n])
+        finally:
+            utils.RollingStats = rolling_stats
+
+        # Only the reference updates, which are not given stats, rebuild the rolling statistics
+        assert len(built) == 20
+        assert np.allclose(floss.mp, outcome[0])
+        assert np.allclose(floss.mp_index, outcome[1])
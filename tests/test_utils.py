@@ -116,3 +116,96 @@ class TestClass(TestCase):
 
         with pytest.raises(ValueError):
             apply_av(a, av)
+
+
+    def test_next_fast_len(self):
+        assert next_fast_len(1) == 1
+        assert next_fast_len(7) == 8
+        assert next_fast_len(97) == 100
+        assert next_fast_len(1025) == 1080
+
+
+    def test_sliding_dot_product_strategies(self):
+        ts = np.random.RandomState(0).randn(5000)
+        for m in (5, 40, 300, 2000):
+            query = ts[100:100 + m]
+            outcome = np.array([np.dot(query, ts[i:i + m]) for i in range(len(ts) - m + 1)])
+            assert np.allclose(sliding_dot_product(query, ts), outcome)
+
+
+    def test_movmeanstd_invalid(self):
+        a = np.array([1.0, 2.0, np.nan, 8.0, 16.0, 32.0])
+        mean, std = mov_mean_std(a, 2)
+        assert np.isnan(mean[1:3]).all() and np.isnan(std[1:3]).all()
+        assert np.allclose(mean[[0, 3, 4]], np.array([1.5, 12.0, 24.0]))
+        assert np.allclose(std[[0, 3, 4]], np.array([0.5, 4.0, 8.0]))
+
+
+    def test_valid_windows(self):
+        assert valid_windows(np.array([1.0, 2.0, 3.0]), 2) is None
+        outcome = np.array([True, False, False, True])
+        assert (valid_windows(np.array([1.0, 2.0, np.inf, 4.0, 5.0]), 2) == outcome).all()
+
+
+    def test_mass_invalid(self):
+        ts = np.array([0.0, 1.0, 1.0, 0.0, np.nan, 1.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0])
+        distances = mass(np.array([0.0, 1.0, 1.0, 0.0]), ts)
+        assert np.isinf(distances[1:5]).all()
+        assert np.allclose(distances[[0, 8]], 0.0)
+        assert np.isinf(mass(np.array([0.0, np.nan, 1.0, 0.0]), ts)).all()
+
+
+    def test_rolling_stats(self):
+        ts = np.random.RandomState(0).randn(1000) * 3 + 5
+        stats = RollingStats(ts)
+        for m in [2, 7, 300]:
+            windows = np.array([ts[i:i + m] for i in range(len(ts) - m + 1)])
+            mean, std = stats.mean_std(m)
+            assert np.allclose(mean, windows.mean(axis=1))
+            assert np.allclose(std, windows.std(axis=1))
+
+
+    def test_rolling_stats_append(self):
+        ts = np.random.RandomState(0).randn(600)
+        stats = RollingStats(ts[:250])
+        stats.mean_std(20)
+        for value in ts[250:300]:
+            stats.append(value)
+        stats.extend(ts[300:])
+
+        assert len(stats) == 600
+        outcome = RollingStats(ts).mean_std(20)
+        assert np.allclose(stats.mean_std(20), outcome)
+
+
+    def test_rolling_stats_precision(self):
+        ts = 1e8 + 1e-2 * np.random.RandomState(0).randn(2000)
+        outcome = np.array([ts[i:i + 50].std() for i in range(len(ts) - 50 + 1)])
+        assert np.allclose(mov_std(ts, 50), outcome, rtol=1e-6)
+        assert (mov_std(np.full(100, 1e8), 10) == 0).all()
+
+
+    def test_rolling_stats_flat(self):
+        ts = np.random.RandomState(0).randn(3000).cumsum() + 1e6
+        ts[1000:2500] = ts[1000]
+        mean, std = mov_mean_std(ts, 100)
+        windows = np.array([ts[i:i + 100] for i in range(len(ts) - 100 + 1)])
+        assert np.allclose(mean, windows.mean(axis=1))
+        assert np.allclose(std, windows.std(axis=1), rtol=1e-6, atol=1e-9)
+        assert (std[1000:2401] == 0).all()
+
+
+    def test_rolling_stats_invalid(self):
+        stats = RollingStats([1.0, 2.0, np.nan, 8.0])
+        stats.extend([16.0, 32.0])
+        mean, std = stats.mean_std(2)
+        assert np.isnan(mean[1:3]).all() and np.isnan(std[1:3]).all()
+        assert np.allclose(mean[[0, 3, 4]], np.array([1.5, 12.0, 24.0]))
+        assert (stats.valid(2) == np.array([True, False, False, True, True])).all()
+        assert RollingStats([1.0, 2.0]).valid(2) is None
+
+
+    def test_mass_stats(self):
+        ts = np.random.RandomState(0).randn(200)
+        query = ts[50:70]
+        assert np.allclose(mass(query, ts, RollingStats(ts)), mass(query, ts))